@@ -4,9 +4,23 @@ import dash_html_components as html
 import dash_bootstrap_components as dbc
 from plotly.graph_objs import *
 from dash.dependencies import Input, Output
-import plotly.express as px
-import pandas as pd
-import requests
+import numpy as np
+import os
+
+import batch_api
+import calculator
+import cdc_data
+import conditions_index
+import dataversion
+import dimensions
+import export
+import health
+import persistent_cache
+import profiling
+import summary
+import tracker
+import validation
+from screener import pre_screener_result
 
 external_stylesheets = [dbc.themes.CYBORG]
 
@@ -24,93 +38,16 @@ styling = {
     'color': colors['text']
 }
 
-age_sex_state_df = pd.read_csv('Covid_Age_Sex_State_Data.csv')
-age_sex_state_df['COVID-19 Deaths'] = age_sex_state_df['COVID-19 Deaths'].fillna(0)
+# The CDC data is loaded on first use (calculator, condition explorer, exports), see cdc_data.py
 
-underlying_conditions_df = pd.read_csv('Covid_Underlying_Conditions_Data.csv')
-underlying_conditions_df['Number of COVID-19 Deaths'] = underlying_conditions_df['Number of COVID-19 Deaths'].fillna(0)
+# Fetch the tracker data at startup so a worker never serves its first request without it
+tracker.current()
 
-raw_us_df_data = requests.get("https://api.covidtracking.com/v1/us/daily.json").json()
-us_historical_df = pd.DataFrame(raw_us_df_data)
-us_historical_df['date'] = pd.to_datetime(us_historical_df['date'], format='%Y%m%d')
-
-raw_state_df_data = requests.get("https://api.covidtracking.com/v1/states/daily.json").json()
-states_daily_df = pd.DataFrame(raw_state_df_data)
-states_daily_df['date'] = pd.to_datetime(states_daily_df['date'], format='%Y%m%d')
-states_daily_df = states_daily_df.sort_values('date').groupby('state', as_index=False).last()
-
-df_overall_states = states_daily_df[['state', 'date', 'positive', 'death', 'recovered']].copy()
-df_overall_states.loc[:, 'positive'] = df_overall_states['positive'].astype('Int32')
-df_overall_states.loc[:, 'death'] = df_overall_states['death'].astype('Int32')
-df_overall_states.loc[:, 'recovered'] = df_overall_states['recovered'].fillna(value=0).astype('Int32')
-
-last_updated_date = df_overall_states.date.max().date()
-
-df_overall_states['text'] = df_overall_states['state'] + '<br>' + \
-                            'Deaths: ' + df_overall_states['death'].astype(str) + '<br>' + \
-                            'Recovered: ' + df_overall_states['recovered'].astype(str) + '<br>'
-
-fig1 = Figure(data=Choropleth(
-    locations=df_overall_states['state'],
-    z=df_overall_states['positive'],
-    locationmode='USA-states',
-    colorscale='Reds',
-    autocolorscale=False,
-    text=df_overall_states['text'],  # hover text
-    colorbar={'title': 'Positive Cases'},
-))
+dataversion.init_app(server)
+profiling.init_app(server)
+server.register_blueprint(health.create_blueprint())
 
 config = dict({'scrollZoom': False, 'displayModeBar': False})
-fig1.update_layout(
-    title_text='USA COVID Tracking Map (Hover for breakdown)<br>Last Updated: ' + str(last_updated_date),
-    # Create a Title
-    font=dict(size=10),
-    geo_scope='usa',
-    template="plotly_dark",
-    margin=dict(l=5, r=5, t=30, b=10),
-    dragmode=False
-)
-
-fig2 = px.bar(us_historical_df, y='positiveIncrease', x='date', text='positiveIncrease',
-              labels={'positiveIncrease': 'New Positive Cases', 'date': 'Date'})
-fig2.update_traces(hovertemplate='%{x}<br>New Positive Cases: %{y}<br>')
-fig2.update_layout(
-    title_text='Daily Trends in Number of COVID-19 Positive Cases in the United States (Hover for each day)',
-    # Create a Title
-    font=dict(size=14),
-    template="plotly_dark",
-    margin=dict(l=5, r=5, t=30, b=10),
-    dragmode=False,
-    uniformtext_minsize=12,
-    uniformtext_mode='hide'
-)
-
-fig3 = px.bar(us_historical_df, y='deathIncrease', x='date', text='deathIncrease',
-              labels={'deathIncrease': 'New Death Cases', 'date': 'Date'})
-fig3.update_traces(hovertemplate='%{x}<br>New Death Cases: %{y}<br>', marker_color='brown')
-fig3.update_layout(
-    title_text='Daily Trends in Number of COVID-19 Deaths in the United States (Hover for each day)',  # Create a Title
-    font=dict(size=14),
-    template="plotly_dark",
-    margin=dict(l=5, r=5, t=30, b=10),
-    dragmode=False,
-    uniformtext_minsize=12,
-    uniformtext_mode='hide'
-)
-
-fig4 = px.bar(us_historical_df, y='hospitalizedIncrease', x='date', text='hospitalizedIncrease',
-              labels={'hospitalizedIncrease': 'New Total Hospitalizations', 'date': 'Date'})
-fig4.update_traces(hovertemplate='%{x}<br>New Total Hospitalizations: %{y}<br>', marker_color='green')
-fig4.update_layout(
-    title_text='Daily Increase in Number of Total Hospitalizations in the United States (Hover for each day)',
-    # Create a Title
-    font=dict(size=14),
-    template="plotly_dark",
-    margin=dict(l=5, r=5, t=30, b=10),
-    dragmode=False,
-    uniformtext_minsize=12,
-    uniformtext_mode='hide'
-)
 
 nav = dbc.Nav(
     [
@@ -121,6 +58,8 @@ nav = dbc.Nav(
         dbc.NavItem(
             dbc.NavLink(html.H5("Frontline Responder Appreciation"), disabled=False, href="/responderappreciation", id="page-4-link")),
         dbc.NavItem(dbc.NavLink(html.H5("Coronavirus Information"), disabled=False, href="/covidinfo", id="page-5-link")),
+        dbc.NavItem(
+            dbc.NavLink(html.H5("Condition Explorer"), disabled=False, href="/conditionexplorer", id="page-6-link")),
     ],
     pills=True, horizontal='center', fill=True,
 )
@@ -144,159 +83,189 @@ app.layout = dbc.Container(
 # this callback uses the current pathname to set the active state of the
 # corresponding nav link to true, allowing users to tell see page they are on
 @app.callback(
-    [Output(f"page-{i}-link", "active") for i in range(1, 6)],
+    [Output(f"page-{i}-link", "active") for i in range(1, 7)],
     [Input("url", "pathname")],
 )
 def toggle_active_links(pathname):
     if pathname == "/" or pathname == "/covidtracker":
         # Treat page 1 as the homepage / index
-        return True, False, False, False, False
+        return True, False, False, False, False, False
     elif pathname == "/covidprescanner":
-        return False, True, False, False, False
+        return False, True, False, False, False, False
     elif pathname == "/survivalratecalc":
-        return False, False, True, False, False
+        return False, False, True, False, False, False
     elif pathname == "/responderappreciation":
-        return False, False, False, True, False
+        return False, False, False, True, False, False
     elif pathname == "/covidinfo":
-        return False, False, False, False, True
+        return False, False, False, False, True, False
+    elif pathname == "/conditionexplorer":
+        return False, False, False, False, False, True
 
 
-us_map = html.Div(
-    [
-        html.Br(),
-        dcc.Graph(style={'width': '100%', 'height': '70vh', 'display': 'flex', 'flex-flow': 'column'},
-                  id='cov-1-graph',
-                  figure=fig1,
-                  config={
-                      'displayModeBar': False,
-                      'scrollZoom': False
-                  }
-                  )
-    ])
-
-positive_summary = [
-    dbc.CardHeader([html.H6("Positive Cases", className="positive-card")]),
-    dbc.CardBody(
-        [
-            html.H4(f"{df_overall_states['positive'].sum():,}", className="card-title1"),
-        ]
-    ),
-]
+def seven_day_average_text(aggregates, metric):
+    average = summary.latest_value(aggregates, 'avg7', summary.NATIONAL, metric)
+    if average != average:
+        return ""
+    return f"7-day avg: {average:+,.0f}/day"
 
-recovered_summary = [
-    dbc.CardHeader([html.H6("Recovered Cases", className="recovered-card")]),
-    dbc.CardBody(
-        [
-            html.H4(f"{df_overall_states['recovered'].sum():,}", className="card-title2"),
-        ]
-    ),
-]
 
-death_summary = [
-    dbc.CardHeader([html.H6("Death Cases", className="death-card")]),
-    dbc.CardBody(
+def build_pg1_content(data):
+    us_map = html.Div(
         [
-            html.H4(f"{df_overall_states['death'].sum():,}", className="card-title3"),
-        ]
-    ),
-]
-
-summary_visualization = html.Div(
-    [
-        html.Br(),
-        html.Br(),
-        html.Br(),
-        dbc.Row(
+            html.Br(),
+            dcc.Graph(style={'width': '100%', 'height': '70vh', 'display': 'flex', 'flex-flow': 'column'},
+                      id='cov-1-graph',
+                      figure=data.fig1,
+                      config={
+                          'displayModeBar': False,
+                          'scrollZoom': False
+                      }
+                      )
+        ])
+
+    positive_summary = [
+        dbc.CardHeader([html.H6("Positive Cases", className="positive-card")]),
+        dbc.CardBody(
             [
-                dbc.Col(dbc.Card(positive_summary, color="warning", inverse=True, outline=True), "auto"),
+                html.H4(f"{summary.states_total(data.summary, 'positive'):,}", className="card-title1"),
+                html.P(seven_day_average_text(data.summary, 'positive'), className="card-text"),
             ]
         ),
-        html.Br(),
-        dbc.Row(
+    ]
+
+    recovered_summary = [
+        dbc.CardHeader([html.H6("Recovered Cases", className="recovered-card")]),
+        dbc.CardBody(
             [
-                dbc.Col(dbc.Card(recovered_summary, color="success", inverse=True, outline=True), "auto"),
+                html.H4(f"{summary.states_total(data.summary, 'recovered'):,}", className="card-title2"),
+                html.P(seven_day_average_text(data.summary, 'recovered'), className="card-text"),
             ]
         ),
-        html.Br(),
-        dbc.Row(
+    ]
+
+    death_summary = [
+        dbc.CardHeader([html.H6("Death Cases", className="death-card")]),
+        dbc.CardBody(
             [
-                dbc.Col(dbc.Card(death_summary, color="danger", inverse=True, outline=True), "auto"),
+                html.H4(f"{summary.states_total(data.summary, 'death'):,}", className="card-title3"),
+                html.P(seven_day_average_text(data.summary, 'death'), className="card-text"),
             ]
         ),
-    ])
-
-pos_increase_visualization = html.Div(
-    [
-        html.Hr(),
-        dcc.Graph(style={'width': '100%', 'height': '50vh', 'display': 'flex', 'flex-flow': 'column'},
-                  id='cov-2-graph',
-                  figure=fig2,
-                  config={
-                      'displayModeBar': False,
-                      'scrollZoom': False
-                  }
-                  ),
-        html.Hr(),
     ]
-)
 
-death_increase_visualization = html.Div(
-    [
-        html.Hr(),
-        dcc.Graph(style={'width': '100%', 'height': '50vh', 'display': 'flex', 'flex-flow': 'column'},
-                  id='cov-3-graph',
-                  figure=fig3,
-                  config={
-                      'displayModeBar': False,
-                      'scrollZoom': False
-                  }
-                  ),
-        html.Hr(),
-    ]
-)
+    summary_visualization = html.Div(
+        [
+            html.Br(),
+            html.Br(),
+            html.Br(),
+            dbc.Row(
+                [
+                    dbc.Col(dbc.Card(positive_summary, color="warning", inverse=True, outline=True), "auto"),
+                ]
+            ),
+            html.Br(),
+            dbc.Row(
+                [
+                    dbc.Col(dbc.Card(recovered_summary, color="success", inverse=True, outline=True), "auto"),
+                ]
+            ),
+            html.Br(),
+            dbc.Row(
+                [
+                    dbc.Col(dbc.Card(death_summary, color="danger", inverse=True, outline=True), "auto"),
+                ]
+            ),
+        ])
 
-hosp_increase_visualization = html.Div(
-    [
-        html.Hr(),
-        dcc.Graph(style={'width': '100%', 'height': '50vh', 'display': 'flex', 'flex-flow': 'column'},
-                  id='cov-4-graph',
-                  figure=fig4,
-                  config={
-                      'displayModeBar': False,
-                      'scrollZoom': False
-                  }
-                  ),
-        html.Hr(),
-    ]
-)
+    pos_increase_visualization = html.Div(
+        [
+            html.Hr(),
+            dcc.Graph(style={'width': '100%', 'height': '50vh', 'display': 'flex', 'flex-flow': 'column'},
+                      id='cov-2-graph',
+                      figure=data.fig2,
+                      config={
+                          'displayModeBar': False,
+                          'scrollZoom': False
+                      }
+                      ),
+            html.Hr(),
+        ]
+    )
+
+    death_increase_visualization = html.Div(
+        [
+            html.Hr(),
+            dcc.Graph(style={'width': '100%', 'height': '50vh', 'display': 'flex', 'flex-flow': 'column'},
+                      id='cov-3-graph',
+                      figure=data.fig3,
+                      config={
+                          'displayModeBar': False,
+                          'scrollZoom': False
+                      }
+                      ),
+            html.Hr(),
+        ]
+    )
+
+    hosp_increase_visualization = html.Div(
+        [
+            html.Hr(),
+            dcc.Graph(style={'width': '100%', 'height': '50vh', 'display': 'flex', 'flex-flow': 'column'},
+                      id='cov-4-graph',
+                      figure=data.fig4,
+                      config={
+                          'displayModeBar': False,
+                          'scrollZoom': False
+                      }
+                      ),
+            html.Hr(),
+        ]
+    )
+
+    pg1_content = html.Div(
+        [
+            dbc.Row(
+                [
+                    dbc.Col(summary_visualization, width=2),
+                    dbc.Col(us_map, width=10),
+                ]
+            ),
+            html.Br(),
+            dbc.Row(
+                [
+                    dbc.Col(pos_increase_visualization, width=12),
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(death_increase_visualization, width=12),
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(hosp_increase_visualization, width=12),
+                ]
+            ),
+            html.P("***The data source is updated each day between about 5:30 PM and 7 PM Eastern Time***")
+        ]
+    )
+    return pg1_content
+
+
+# Page 1 is rebuilt only when the data version changes
+_pg1_content_cache = (None, None)
+
+
+def current_pg1_content():
+    global _pg1_content_cache
+    data_version = dataversion.current()
+    version, pg1_content = _pg1_content_cache
+    if version != data_version:
+        pg1_content = persistent_cache.get_or_build('layout', 'pg1-' + data_version,
+                                                    lambda: build_pg1_content(tracker.current()))
+        _pg1_content_cache = (data_version, pg1_content)
+    return pg1_content
 
-pg1_content = html.Div(
-    [
-        dbc.Row(
-            [
-                dbc.Col(summary_visualization, width=2),
-                dbc.Col(us_map, width=10),
-            ]
-        ),
-        html.Br(),
-        dbc.Row(
-            [
-                dbc.Col(pos_increase_visualization, width=12),
-            ]
-        ),
-        dbc.Row(
-            [
-                dbc.Col(death_increase_visualization, width=12),
-            ]
-        ),
-        dbc.Row(
-            [
-                dbc.Col(hosp_increase_visualization, width=12),
-            ]
-        ),
-        html.P("***The data source is updated each day between about 5:30 PM and 7 PM Eastern Time***")
-    ]
-)
 
 switches = dbc.FormGroup(
     [
@@ -358,54 +327,6 @@ pg2_content = html.Div(
 )
 
 
-def pre_screener_result(switches_value):
-    screening_result = ""
-    color = "warning"
-    symptoms_score_mapping = {
-        "Fever": 89,
-        "Cough": 68,
-        "Fatigue": 30,
-        "Sputum": 18,
-        "Muscle": 14,
-        "Headache": 16,
-        "Sore": 16,
-        "Nausea": 5,
-        "Diarrhea": 5,
-        "Breathing": 209,
-        "Chest": 209,
-        "Confusion": 209,
-        "Bluish": 209,
-        "Age": 52,
-        "Chronic": 52
-    }
-    emergency_symptom_list = ["Breathing", "Chest", "Confusion", "Bluish"]
-    major_symptom_list = ["Fever", "Cough"]
-    check_any_emergency_symptoms = any(item in switches_value for item in emergency_symptom_list)
-    check_all_major_symptoms = all(item in switches_value for item in major_symptom_list)
-    final_score = 0
-    for symptom in switches_value:
-        final_score += symptoms_score_mapping[symptom]
-    if final_score >= 209:
-        if check_any_emergency_symptoms:
-            color = "danger"
-            if check_all_major_symptoms:
-                screening_result = "Your symptoms indicate that you should consult a doctor immediately for COVID-19 " \
-                                   "testing. "
-            else:
-                screening_result = "Your symptoms indicate that you should consult a doctor immediately."
-        else:
-            screening_result = "Your symptoms indicate that you should consult a doctor immediately for COVID-19 " \
-                               "testing. "
-    else:
-        screening_result = "Your symptoms indicate that currently you do not need COVID-19 testing. Please continue " \
-                           "to monitor your " \
-                           "health and practice social distancing. Avoid leaving the house unnecessarily. If you must " \
-                           "leave the " \
-                           "house, wear a mask or other face covering and stay at least 6 feet away from others."
-        color = "success"
-    return screening_result, color
-
-
 @app.callback(Output("switches-checklist-output", "children"), [Input("switches-input", "value"), ], )
 def on_form_change(switches_value):
     template = ""
@@ -456,21 +377,8 @@ style_calc_items = {
     'zoom': '1.1'
 }
 
-age_map_multiple_dfs = {
-    '0-24 years': '0-24', '25-34 years': '25-34', '35-44 years': '35-44', '45-54 years': '45-54',
-    '55-64 years': '55-64', '65-74 years': '65-74', '75-84 years': '75-84',
-    '85 years and over': '85+'
-}
-
-unique_age_groups = ['0-24', '25-34', '35-44', '45-54', '55-64', '65-74', '75-84',
-                     '85+']
-
-age_group_options = []
-for age_group in unique_age_groups:
-    if age_group == '85+':
-        age_group_options.append({"label": age_group, "value": "85 years and over"})
-    else:
-        age_group_options.append({"label": age_group, "value": age_group + " years"})
+age_group_options = [{"label": bucket.label, "value": bucket.value}
+                     for bucket in dimensions.calculator_age_buckets]
 
 
 age_group_radioitems = dbc.FormGroup(
@@ -502,61 +410,6 @@ unique_states = ['Alabama', 'Alaska', 'Arizona', 'Arkansas', 'California',
                  'Vermont', 'Virginia', 'Washington', 'West Virginia', 'Wisconsin', 'Wyoming',
                  'Puerto Rico']
 
-us_state_abbrev = {
-    'Alabama': 'AL',
-    'Alaska': 'AK',
-    'Arizona': 'AZ',
-    'Arkansas': 'AR',
-    'California': 'CA',
-    'Colorado': 'CO',
-    'Connecticut': 'CT',
-    'Delaware': 'DE',
-    'District of Columbia': 'DC',
-    'Florida': 'FL',
-    'Georgia': 'GA',
-    'Hawaii': 'HI',
-    'Idaho': 'ID',
-    'Illinois': 'IL',
-    'Indiana': 'IN',
-    'Iowa': 'IA',
-    'Kansas': 'KS',
-    'Kentucky': 'KY',
-    'Louisiana': 'LA',
-    'Maine': 'ME',
-    'Maryland': 'MD',
-    'Massachusetts': 'MA',
-    'Michigan': 'MI',
-    'Minnesota': 'MN',
-    'Mississippi': 'MS',
-    'Missouri': 'MO',
-    'Montana': 'MT',
-    'Nebraska': 'NE',
-    'Nevada': 'NV',
-    'New Hampshire': 'NH',
-    'New Jersey': 'NJ',
-    'New Mexico': 'NM',
-    'New York': 'NY',
-    'North Carolina': 'NC',
-    'North Dakota': 'ND',
-    'Ohio': 'OH',
-    'Oklahoma': 'OK',
-    'Oregon': 'OR',
-    'Pennsylvania': 'PA',
-    'Puerto Rico': 'PR',
-    'Rhode Island': 'RI',
-    'South Carolina': 'SC',
-    'South Dakota': 'SD',
-    'Tennessee': 'TN',
-    'Texas': 'TX',
-    'Utah': 'UT',
-    'Vermont': 'VT',
-    'Virginia': 'VA',
-    'Washington': 'WA',
-    'West Virginia': 'WV',
-    'Wisconsin': 'WI',
-    'Wyoming': 'WY'
-}
-
 state_options = []
 for state in unique_states:
     state_options.append({"label": state, "value": state})
@@ -625,6 +478,28 @@ health_cond_checkbox = dbc.FormGroup(
     ]
 )
 
+compare_radioitems = dbc.FormGroup(
+    [
+        dbc.Row(
+            [
+                dbc.Col(dbc.Label("Compare", style=style_calc_row_label, ), width=2),
+                dbc.Col(dbc.RadioItems(
+                    options=[
+                        {"label": "Off", "value": "off"},
+                        {"label": "Age groups x states", "value": "grid"},
+                        {"label": "Across age groups", "value": "age"},
+                        {"label": "Across states", "value": "state"},
+                    ],
+                    value="off",
+                    inline=True,
+                    id="compare-radioitems-input",
+                    style=style_calc_items,
+                ), width=10),
+            ]
+        )
+    ]
+)
+
 pg3_content = html.Div(
     [
         html.Br(),
@@ -640,55 +515,66 @@ pg3_content = html.Div(
                 dbc.Col(id="switches-calc-checklist-output", width=12),
             ]
         ),
+        dbc.Row(
+            [
+                dbc.Col(dbc.Form([compare_radioitems]), width=12),
+            ]
+        ),
+        dbc.Row(
+            [
+                dbc.Col(id="calc-comparison-output", width=12),
+            ]
+        ),
         html.P("***Please note this is just an estimation, and not an absolute assessment of the effects covid-19 "
                "might have on you.***")
     ]
 )
 
 
+_survival_tables = None
+
+
+def current_survival_tables():
+    global _survival_tables
+    if _survival_tables is None:
+        data = cdc_data.current()
+        _survival_tables = persistent_cache.get_or_build(
+            'calculator', data.digest + '-' + validation.default_mode,
+            lambda: calculator.build_survival_tables(data.dimensions, unique_states, unique_diseases))
+    return _survival_tables
+
+
 def calc_death_rate_demographics(age_group_value, state_value, gender_value):
-    if age_group_value == '0-24 years':
-        deaths_under1_query_result = age_sex_state_df.loc[
-            (age_sex_state_df['Age group'] == "Under 1 year") & (age_sex_state_df['State'] == state_value) & (
-                    age_sex_state_df['Sex'] == gender_value), ['COVID-19 Deaths']].values[0].flat[0]
-        deaths_1to4_query_result = age_sex_state_df.loc[
-            (age_sex_state_df['Age group'] == "1-4 years") & (age_sex_state_df['State'] == state_value) & (
-                    age_sex_state_df['Sex'] == gender_value), ['COVID-19 Deaths']].values[0].flat[0]
-        deaths_5to14_query_result = age_sex_state_df.loc[
-            (age_sex_state_df['Age group'] == "5-14 years") & (age_sex_state_df['State'] == state_value) & (
-                    age_sex_state_df['Sex'] == gender_value), ['COVID-19 Deaths']].values[0].flat[0]
-        deaths_15to24_query_result = age_sex_state_df.loc[
-            (age_sex_state_df['Age group'] == "15-24 years") & (age_sex_state_df['State'] == state_value) & (
-                    age_sex_state_df['Sex'] == gender_value), ['COVID-19 Deaths']].values[0].flat[0]
-        deaths_query_result = deaths_under1_query_result + deaths_1to4_query_result + deaths_5to14_query_result + deaths_15to24_query_result
-    else:
-        deaths_query_result = age_sex_state_df.loc[
-            (age_sex_state_df['Age group'] == age_group_value) & (age_sex_state_df['State'] == state_value) & (
-                    age_sex_state_df['Sex'] == gender_value), ['COVID-19 Deaths']].values[0].flat[0]
-    total_us_deaths_query_result = age_sex_state_df.loc[
-        (age_sex_state_df['Age group'] == "All Ages") & (age_sex_state_df['State'] == "United States") & (
-                age_sex_state_df['Sex'] == "All Sexes"), ['COVID-19 Deaths']].values[0].flat[0]
-    death_rate_demographics = (deaths_query_result/total_us_deaths_query_result)*100
-    return death_rate_demographics
+    survival_tables = current_survival_tables()
+    codes = survival_tables.codes
+    return survival_tables.demographic_rates[codes['age_groups'][age_group_value], codes['states'][state_value],
+                                             codes['genders'][gender_value]]
 
 
 def calc_death_rate_diseases(age_group_value, state_value, health_conditions_values):
-    state_code = us_state_abbrev[state_value]
-    age_group = age_map_multiple_dfs[age_group_value]
+    survival_tables = current_survival_tables()
+    codes = survival_tables.codes
+    disease_rates = survival_tables.disease_rates[codes['age_groups'][age_group_value], codes['states'][state_value]]
     death_rate_all_conditions = 0
     for condition in health_conditions_values:
-        condition_total_deaths = underlying_conditions_df.loc[
-            (underlying_conditions_df['Age Group'] == "All Ages") & (underlying_conditions_df['State'] == "US") & (
-                    underlying_conditions_df['Condition Group'] == condition), ['Number of COVID-19 Deaths']].values.sum()
-        deaths_query_result = underlying_conditions_df.loc[
-            (underlying_conditions_df['Age Group'] == age_group) & (
-                        underlying_conditions_df['State'] == state_code) & (
-                    underlying_conditions_df['Condition Group'] == condition), ['Number of COVID-19 Deaths']].values.sum()
-        conditional_death_rate = (deaths_query_result / condition_total_deaths) * 100
-        death_rate_all_conditions += conditional_death_rate
+        death_rate_all_conditions += disease_rates[codes['diseases'][condition]]
     return death_rate_all_conditions
 
 
+server.register_blueprint(batch_api.create_blueprint(current_survival_tables))
+server.register_blueprint(export.create_blueprint({
+    'us-daily': export.Dataset(lambda: tracker.current().us_historical_df, 'date'),
+    'states-daily': export.Dataset(lambda: tracker.current().states_history_df, 'date'),
+    'states-latest': export.Dataset(lambda: tracker.current().df_overall_states.drop(columns='text'), 'date'),
+    'cdc-age-sex-state': export.Dataset(lambda: cdc_data.current().age_sex_state_df, None),
+    'cdc-underlying-conditions': export.Dataset(lambda: cdc_data.current().underlying_conditions_df, None),
+    'cdc-deaths-by-state-sex-age': export.Dataset(
+        lambda: dimensions.deaths_frame(cdc_data.current().dimensions), None),
+    'cdc-condition-deaths-by-state-age': export.Dataset(
+        lambda: dimensions.condition_deaths_frame(cdc_data.current().dimensions), None),
+}))
+
+
 @app.callback(Output("switches-calc-checklist-output", "children"),
               [Input("age-group-radioitems-input", "value"), Input("state-dropdown-input", "value"),
                Input("gender-radioitems-input", "value"), Input("health-cond-checkbox-input", "value"), ], )
@@ -723,6 +609,63 @@ def on_form_change(age_group_value, state_value, gender_value, health_conditions
     return template
 
 
+
+# Resolved once: validating a plotly Figure per request costs far more than computing the grid
+comparison_layout = Figure(layout=dict(
+    font=dict(size=12),
+    template="plotly_dark",
+    margin=dict(l=5, r=5, t=30, b=10),
+    dragmode=False,
+    showlegend=False,
+)).to_plotly_json()['layout']
+
+
+def build_comparison_figure(compare_value, age_group_value, state_value, gender_value, health_conditions_values):
+    # The whole age group x state grid is one vectorized pass; the bar charts are slices of it
+    survival_tables = current_survival_tables()
+    grid = calculator.survival_grid(survival_tables, gender_value, health_conditions_values)
+    age_labels = [bucket.label for bucket in dimensions.calculator_age_buckets]
+    age_code = survival_tables.codes['age_groups'][age_group_value]
+    state_code = survival_tables.codes['states'][state_value]
+    lowest = float(np.nanmin(grid))
+    layout = dict(comparison_layout)
+    if compare_value == 'grid':
+        data = [
+            {'type': 'heatmap', 'z': grid.tolist(), 'x': survival_tables.states, 'y': age_labels,
+             'colorscale': 'RdYlGn', 'zmin': lowest, 'zmax': 100, 'colorbar': {'title': {'text': 'Survival %'}},
+             'hovertemplate': '%{x}, %{y}<br>Estimated survival rate: %{z:.4f}%<extra></extra>'},
+            {'type': 'scatter', 'x': [state_value], 'y': [age_labels[age_code]], 'mode': 'markers',
+             'hoverinfo': 'skip', 'marker': {'symbol': 'square-open', 'size': 14, 'color': 'white'}},
+        ]
+        title = 'Estimated survival rate by age group and state'
+    else:
+        if compare_value == 'age':
+            x, y = age_labels, grid[:, state_code]
+            title = 'Estimated survival rate by age group in ' + state_value
+        else:
+            x, y = survival_tables.states, grid[age_code]
+            title = 'Estimated survival rate by state, ages ' + age_labels[age_code]
+        data = [{'type': 'bar', 'x': x, 'y': y.tolist(),
+                 'hovertemplate': '%{x}<br>Estimated survival rate: %{y:.4f}%<extra></extra>'}]
+        # Survival rates sit just below 100%, so zoom in on the differences
+        layout['yaxis'] = {'range': [lowest - 0.05 * (100 - lowest), 100]}
+    layout['title'] = {'text': title}
+    return {'data': data, 'layout': layout}
+
+
+@app.callback(Output("calc-comparison-output", "children"),
+              [Input("compare-radioitems-input", "value"), Input("age-group-radioitems-input", "value"),
+               Input("state-dropdown-input", "value"), Input("gender-radioitems-input", "value"),
+               Input("health-cond-checkbox-input", "value"), ], )
+def on_compare_change(compare_value, age_group_value, state_value, gender_value, health_conditions_values):
+    if compare_value == 'off':
+        return ""
+    fig = build_comparison_figure(compare_value, age_group_value, state_value, gender_value,
+                                  health_conditions_values)
+    return dcc.Graph(style={'width': '100%', 'height': '60vh'}, figure=fig,
+                     config={'displayModeBar': False, 'scrollZoom': False})
+
+
 # fundraising_quote = html.Div(
 #     [
 #         html.Blockquote(
@@ -979,10 +922,137 @@ pg5_content = html.Div(
 )
 
 
+explorer_state_names = {state.abbrev: state.name for state in dimensions.STATES}
+
+
+def explorer_dropdown(label, filter_name, options, placeholder, value=None):
+    return dbc.FormGroup(
+        [
+            dbc.Row(
+                [
+                    dbc.Col(dbc.Label(label, style=style_calc_row_label, ), width=2),
+                    dbc.Col(dcc.Dropdown(
+                        options=options,
+                        value=value or [],
+                        multi=True,
+                        placeholder=placeholder,
+                        id=f"explorer-{filter_name}-input",
+                    ), width=10),
+                ]
+            )
+        ]
+    )
+
+
+def build_pg6_content(index):
+    explorer_filters = [
+        explorer_dropdown("State", 'state', [
+            {"label": explorer_state_names.get(state, state), "value": state}
+            for state in index.postings['state']], "All states", [dimensions.NATIONAL.abbrev]),
+        explorer_dropdown("Age Group", 'age_group', [
+            {"label": age_group, "value": age_group}
+            for age_group in index.postings['age_group']], "All age groups",
+            [dimensions.ALL_AGES.label]),
+        explorer_dropdown("Condition Group", 'condition_group', [
+            {"label": group, "value": group}
+            for group in index.postings['condition_group']], "All condition groups"),
+        explorer_dropdown("Condition", 'condition', [
+            {"label": condition, "value": condition}
+            for condition in index.postings['condition']], "All conditions"),
+        dbc.FormGroup(
+            [
+                dbc.Row(
+                    [
+                        dbc.Col(dbc.Label("ICD-10 Code", style=style_calc_row_label, ), width=2),
+                        dbc.Col(dbc.Input(
+                            type="text",
+                            value="",
+                            placeholder="Code prefix, e.g. J1 or I50",
+                            id="explorer-icd10-input",
+                        ), width=10),
+                    ]
+                )
+            ]
+        ),
+    ]
+
+    return html.Div(
+        [
+            html.Br(),
+            dbc.Row(
+                [
+                    dbc.Col(dbc.Form(explorer_filters), width=12),
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(id="explorer-output", width=12),
+                ]
+            ),
+            html.P("***Deaths involving COVID-19 with the condition listed on the death certificate. The United States "
+                   "and All Ages rows are totals of the others, so include them or their parts, not both. The source "
+                   "for this data is Centers for Disease Control and Prevention (CDC)***")
+        ]
+    )
+
+
+_pg6_content = None
+
+
+def current_pg6_content():
+    # Built on first visit, from the CDC data it loads
+    global _pg6_content
+    if _pg6_content is None:
+        _pg6_content = build_pg6_content(cdc_data.current().conditions_index)
+    return _pg6_content
+
+
+# Rows shown in the explorer table; the chart and totals always cover every match
+EXPLORER_TABLE_ROWS = 200
+
+
+@app.callback(Output("explorer-output", "children"),
+              [Input("explorer-state-input", "value"), Input("explorer-age_group-input", "value"),
+               Input("explorer-condition_group-input", "value"), Input("explorer-condition-input", "value"),
+               Input("explorer-icd10-input", "value"), ], )
+def on_explorer_change(state_values, age_group_values, condition_group_values, condition_values, icd10_value):
+    index = cdc_data.current().conditions_index
+    matched = conditions_index.query(index, icd10_prefix=icd10_value, state=state_values,
+                                     age_group=age_group_values, condition_group=condition_group_values,
+                                     condition=condition_values)
+    totals = conditions_index.deaths_by_condition(index, matched)
+    fig = {
+        'data': [{'type': 'bar', 'orientation': 'h', 'x': [total for _, total in totals],
+                  'y': [condition for condition, _ in totals],
+                  'hovertemplate': '%{y}<br>COVID-19 Deaths: %{x:,}<extra></extra>'}],
+        'layout': dict(comparison_layout, title={'text': 'COVID-19 deaths by condition'},
+                       yaxis={'automargin': True, 'autorange': 'reversed'},
+                       height=max(300, 30 * len(totals) + 80)),
+    }
+    shown = matched[:EXPLORER_TABLE_ROWS]
+    table = dbc.Table(
+        [html.Thead(html.Tr([html.Th(column) for column in conditions_index.DISPLAY_COLUMNS + ['COVID-19 Deaths']]))]
+        + [html.Tbody([
+            html.Tr([html.Td(index.rows[column][row]) for column in conditions_index.DISPLAY_COLUMNS]
+                    + [html.Td(f"{index.deaths[row]:,.0f}")])
+            for row in shown.tolist()])],
+        bordered=True, dark=True, hover=True, size="sm", striped=True,
+    )
+    matched_text = f"{len(matched):,} matching rows, {index.deaths[matched].sum():,.0f} COVID-19 deaths in total"
+    if len(matched) > len(shown):
+        matched_text += f" (first {len(shown)} rows shown)"
+    return html.Div(
+        [
+            html.H5(matched_text),
+            dcc.Graph(figure=fig, config={'displayModeBar': False, 'scrollZoom': False}) if totals else "",
+            table,
+        ])
+
+
 @app.callback(Output("page-content", "children"), [Input("url", "pathname")])
 def render_page_content(pathname):
     if pathname in ["/", "/covidtracker"]:
-        return pg1_content
+        return current_pg1_content()
     elif pathname == "/covidprescanner":
         return pg2_content
     elif pathname == "/survivalratecalc":
@@ -991,6 +1061,8 @@ def render_page_content(pathname):
         return pg4_content
     elif pathname == "/covidinfo":
         return pg5_content
+    elif pathname == "/conditionexplorer":
+        return current_pg6_content()
     # If the user tries to reach a different page, return a 404 message
     return dbc.Jumbotron(
         [
@@ -1002,4 +1074,7 @@ def render_page_content(pathname):
 
 
 if __name__ == '__main__':
+    tracker.start_background_refresh(int(os.environ.get('TRACKER_REFRESH_SECONDS', '0')))
+    # The development server runs every request in its own thread
+    profiling.set_worker('the threaded development server', True)
     app.run_server(debug=False)
@@ -0,0 +1,97 @@
+import json
+
+import numpy as np
+from flask import Blueprint, Response, jsonify, request
+
+import calculator
+import encoding
+import screener
+
+# Rows serialized per chunk of the streamed NDJSON response
+CHUNK_ROWS = 8192
+
+
+def _number(value):
+    # NaN (e.g. a disease without any US deaths) is not valid JSON
+    return 'null' if value != value else repr(value)
+
+
+def _column(payload, name, length=None, default=None):
+    values = payload.get(name, default)
+    if not isinstance(values, list):
+        raise ValueError(f"'{name}' must be an array")
+    if length is not None and len(values) != length:
+        raise ValueError(f"'{name}' has {len(values)} entries, expected {length}")
+    return values
+
+
+def _ndjson(chunks):
+    return Response(chunks, mimetype='application/x-ndjson')
+
+
+def create_blueprint(get_survival_tables):
+    # ``get_survival_tables`` is called per request, so the CDC data is only loaded once the API is used
+    batch_api = Blueprint('batch_api', __name__, url_prefix='/api/v1')
+
+    @batch_api.errorhandler(ValueError)
+    def bad_request(error):
+        return jsonify(error=str(error)), 400
+
+    def json_payload():
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            raise ValueError("Request body must be a JSON object")
+        return payload
+
+    @batch_api.route('/survival-rate/batch', methods=['POST'])
+    def survival_rate_batch():
+        payload = json_payload()
+        age_groups = _column(payload, 'age_group')
+        states = _column(payload, 'state', len(age_groups))
+        genders = _column(payload, 'gender', len(age_groups))
+        health_conditions = _column(payload, 'health_conditions', len(age_groups),
+                                    default=[[]] * len(age_groups))
+        if not all(isinstance(values, list) for values in health_conditions):
+            raise ValueError("'health_conditions' must be an array of arrays")
+        demographics, diseases, survival = calculator.survival_rates(get_survival_tables(), age_groups, states,
+                                                                     genders, health_conditions)
+
+        def generate():
+            for start in range(0, len(survival), CHUNK_ROWS):
+                stop = start + CHUNK_ROWS
+                yield ''.join(
+                    '{"death_rate_demographics": %s, "death_rate_diseases": %s, "survival_rate": %s}\n'
+                    % (_number(d), _number(c), _number(s))
+                    for d, c, s in zip(demographics[start:stop].tolist(), diseases[start:stop].tolist(),
+                                       survival[start:stop].tolist()))
+
+        return _ndjson(generate())
+
+    outcome_lines = np.array([json.dumps({'screening_result': message, 'color': color}) + '\n'
+                              for message, color in screener.outcomes], dtype=object)
+
+    @batch_api.route('/pre-screener/batch', methods=['POST'])
+    def pre_screener_batch():
+        payload = json_payload()
+        if 'symptom_masks' in payload:
+            # Pre-encoded bitmasks: bit i set means screener.symptoms[i] is present
+            masks = _column(payload, 'symptom_masks')
+            encoding.check_types(masks, 'symptom mask', 'integer')
+            # Range-checked as Python ints, before anything can overflow int64
+            if masks and (min(masks) < 0 or max(masks) > screener.all_symptoms_mask):
+                raise ValueError(f"'symptom_masks' must be integers between 0 and {screener.all_symptoms_mask}")
+            masks = np.array(masks, dtype=np.int64)
+        else:
+            symptom_lists = _column(payload, 'symptoms')
+            if not all(isinstance(values, list) for values in symptom_lists):
+                raise ValueError("'symptoms' must be an array of arrays")
+            masks = screener.encode_symptom_masks(symptom_lists)
+        results = screener.pre_screener_outcomes(masks)
+
+        def generate():
+            for start in range(0, len(results), CHUNK_ROWS):
+                yield ''.join(outcome_lines[results[start:start + CHUNK_ROWS]])
+
+        return _ndjson(generate())
+
+    return batch_api
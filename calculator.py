@@ -0,0 +1,81 @@
+import collections
+
+import numpy as np
+
+import dimensions
+from encoding import encode, encode_ragged
+
+GENDERS = ['Male', 'Female', 'Unknown']
+
+# Dense lookup arrays behind the survival rate calculator, indexed by integer codes (positions in the
+# ``age_groups``/``states``/``genders``/``diseases`` lists) so that any number of profiles is evaluated
+# with a handful of NumPy gathers instead of one pair of pandas filters per profile.
+SurvivalTables = collections.namedtuple('SurvivalTables', [
+    'age_groups', 'states', 'genders', 'diseases',
+    'codes',  # {'age_groups': {label: code}, 'states': ..., 'genders': ..., 'diseases': ...}
+    'demographic_rates',  # [age, state, gender] -> death rate in percent of all US COVID-19 deaths
+    'disease_rates',  # [age, state, disease] -> death rate in percent of the disease's US COVID-19 deaths
+])
+
+
+def build_survival_tables(dims, states, diseases, age_buckets=dimensions.calculator_age_buckets):
+    # Pure gathers from the shared dimension cubes; age groups are the buckets' calculator values
+    age_groups = [bucket.value for bucket in age_buckets]
+    age_index = [dims.age_buckets.index(bucket) for bucket in age_buckets]
+    state_index = [dims.state_codes[state] for state in states]
+    sex_index = [dims.sexes.index(gender) for gender in GENDERS]
+    disease_index = [dims.condition_groups.index(disease) for disease in diseases]
+    national = dims.state_codes[dimensions.NATIONAL.name]
+    all_ages = dims.age_buckets.index(dimensions.ALL_AGES)
+
+    total_us_deaths = dims.deaths[national, dims.sexes.index('All Sexes'), all_ages]
+    demographic_deaths = dims.deaths[np.ix_(state_index, sex_index, age_index)].transpose(2, 0, 1)
+    demographic_rates = demographic_deaths / total_us_deaths * 100
+
+    disease_deaths = dims.condition_deaths[np.ix_(state_index, age_index, disease_index)].transpose(1, 0, 2)
+    disease_totals = dims.condition_deaths[national, all_ages, disease_index]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        disease_rates = disease_deaths / disease_totals * 100
+
+    codes = {name: {label: code for code, label in enumerate(labels)} for name, labels in [
+        ('age_groups', age_groups), ('states', states), ('genders', GENDERS), ('diseases', diseases)]}
+    return SurvivalTables(age_groups=age_groups, states=list(states), genders=list(GENDERS),
+                          diseases=list(diseases), codes=codes, demographic_rates=demographic_rates,
+                          disease_rates=disease_rates)
+
+
+def encode_counts(value_lists, vocabulary, name):
+    # [row, vocabulary] occurrence counts for ragged lists of labels, built without a per-row Python loop
+    rows, codes = encode_ragged(value_lists, vocabulary, name)
+    counts = np.zeros((len(value_lists), len(vocabulary)), dtype=np.int64)
+    np.add.at(counts, (rows, codes), 1)
+    return counts
+
+
+def death_rate_demographics(tables, age_codes, state_codes, gender_codes):
+    return tables.demographic_rates[age_codes, state_codes, gender_codes]
+
+
+def death_rate_diseases(tables, age_codes, state_codes, disease_counts):
+    # Rates are NaN where a disease has no US deaths at all; only selected diseases may contribute that NaN
+    rates = tables.disease_rates[age_codes, state_codes]
+    return np.where(disease_counts > 0, rates * disease_counts, 0.0).sum(axis=1)
+
+
+def survival_rates(tables, age_groups, states, genders, health_conditions):
+    age_codes = encode(age_groups, tables.age_groups, 'age group')
+    state_codes = encode(states, tables.states, 'state')
+    gender_codes = encode(genders, tables.genders, 'gender')
+    disease_counts = encode_counts(health_conditions, tables.diseases, 'health condition')
+    demographics = death_rate_demographics(tables, age_codes, state_codes, gender_codes)
+    diseases = death_rate_diseases(tables, age_codes, state_codes, disease_counts)
+    return demographics, diseases, 100 - (demographics + diseases)
+
+
+def survival_grid(tables, gender, health_conditions):
+    # One profile's survival rate for every age group x state, [age, state], in a single broadcast
+    gender_code = encode([gender], tables.genders, 'gender')[0]
+    disease_counts = encode_counts([health_conditions], tables.diseases, 'health condition')[0]
+    demographics = tables.demographic_rates[:, :, gender_code]
+    diseases = np.where(disease_counts > 0, tables.disease_rates * disease_counts, 0.0).sum(axis=2)
+    return 100 - (demographics + diseases)
@@ -0,0 +1,103 @@
+import collections
+import concurrent.futures
+import hashlib
+import os
+import threading
+import time
+
+import pandas as pd
+
+import conditions_index
+import dimensions
+import metrics
+import persistent_cache
+import validation
+
+# The two CDC CSV files, resolved next to this module so the app runs from any working directory. Nothing is
+# read at import: the first caller of current() (the calculator, the condition explorer, the exports) loads
+# both files in parallel. Parsed frames go to the persistent cache keyed by each file's name, size and
+# mtime, so later loads (other workers, restarts) skip the CSV parsing until a file changes.
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+AGE_SEX_STATE_CSV = os.path.join(DATA_DIR, 'Covid_Age_Sex_State_Data.csv')
+UNDERLYING_CONDITIONS_CSV = os.path.join(DATA_DIR, 'Covid_Underlying_Conditions_Data.csv')
+CSV_FILES = [AGE_SEX_STATE_CSV, UNDERLYING_CONDITIONS_CSV]
+
+CdcData = collections.namedtuple('CdcData', [
+    'digest',  # sha1 over the contents of both files
+    'age_sex_state_df', 'underlying_conditions_df',  # validated, suppressed counts filled with 0
+    'dimensions',  # dimensions.Dimensions
+    'conditions_index',  # conditions_index.ConditionsIndex
+])
+
+_current = None
+_load_lock = threading.Lock()
+_files_signature = None
+
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return f"{os.path.basename(path)}-{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def files_signature():
+    # Cheap identity of the files on disk (no reads), computed once per process like the data itself
+    global _files_signature
+    if _files_signature is None:
+        _files_signature = hashlib.sha1('\0'.join(_stat_key(path) for path in CSV_FILES).encode('utf-8')).hexdigest()
+    return _files_signature
+
+
+def read_csv(path):
+    # (sha1 of the file, parsed frame); the digest is stored with the frame so a cache hit never reads the CSV
+    return persistent_cache.get_or_build(
+        'csv', _stat_key(path), lambda: (persistent_cache.file_digest([path]), pd.read_csv(path)))
+
+
+def load():
+    # Each stage is timed as cdc.<stage> (see metrics.py)
+    laps = metrics.Laps('cdc')
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(CSV_FILES)) as pool:
+        (age_sex_digest, age_sex_state_df), (conditions_digest, underlying_conditions_df) = pool.map(
+            read_csv, CSV_FILES)
+    laps.lap('read')
+
+    age_sex_state_df, _ = validation.validate(age_sex_state_df, 'cdc_age_sex_state', validation.age_sex_state_columns)
+    age_sex_state_df['COVID-19 Deaths'] = age_sex_state_df['COVID-19 Deaths'].fillna(0)
+
+    underlying_conditions_df, _ = validation.validate(underlying_conditions_df, 'cdc_underlying_conditions',
+                                                      validation.underlying_conditions_columns)
+    underlying_conditions_df['Number of COVID-19 Deaths'] = \
+        underlying_conditions_df['Number of COVID-19 Deaths'].fillna(0)
+    laps.lap('validate')
+
+    cdc_dimensions = dimensions.build_dimensions(age_sex_state_df, underlying_conditions_df)
+    laps.lap('dimensions')
+    index = conditions_index.build_index(underlying_conditions_df)
+    laps.lap('index')
+
+    metrics.set_gauge('cdc_rows', len(age_sex_state_df), dataset='cdc_age_sex_state')
+    metrics.set_gauge('cdc_rows', len(underlying_conditions_df), dataset='cdc_underlying_conditions')
+    return CdcData(
+        digest=hashlib.sha1((age_sex_digest + conditions_digest).encode('utf-8')).hexdigest(),
+        age_sex_state_df=age_sex_state_df,
+        underlying_conditions_df=underlying_conditions_df,
+        dimensions=cdc_dimensions,
+        conditions_index=index,
+    )
+
+
+def current():
+    global _current
+    data = _current
+    if data is None:
+        with _load_lock:
+            if _current is None:
+                _current = load()
+                metrics.set_gauge('cdc_data_loaded_timestamp_seconds', time.time())
+            data = _current
+    return data
+
+
+def loaded():
+    # The loaded data without triggering a load; None until the first caller of current() has loaded it
+    return _current
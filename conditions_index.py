@@ -0,0 +1,135 @@
+import bisect
+import collections
+import re
+
+import numpy as np
+import pandas as pd
+
+# Row index over the CDC underlying conditions table for the condition explorer. Every filterable column gets
+# an inverted index (value -> sorted row positions) and the ICD-10 code lists get a sorted prefix index, so a
+# query is a few dictionary lookups and sorted-array intersections instead of string masks over every row.
+FILTER_COLUMNS = {
+    'state': 'State',
+    'age_group': 'Age Group',
+    'condition_group': 'Condition Group',
+    'condition': 'Condition',
+}
+DISPLAY_COLUMNS = ['State', 'Age Group', 'Condition Group', 'Condition', 'ICD10_codes']
+DEATHS_COLUMN = 'Number of COVID-19 Deaths'
+
+ConditionsIndex = collections.namedtuple('ConditionsIndex', [
+    'rows',  # {column: object array} for DISPLAY_COLUMNS
+    'deaths',  # float array of COVID-19 deaths per row
+    'postings',  # {filter name: {value: sorted int64 row positions}}
+    'conditions',  # condition names, in order of first appearance
+    'condition_codes',  # int array: row -> position in ``conditions``
+    'icd_codes',  # sorted normalized ICD-10 codes, every range expanded to its categories
+    'icd_conditions',  # parallel to ``icd_codes``: position in ``conditions``
+])
+
+_RANGE = re.compile(r'^([A-Z])(\d{2})-([A-Z])(\d{2})$')
+
+
+def normalize_code(code):
+    return code.strip().upper().replace('.', '')
+
+
+def expand_icd10(codes):
+    # 'I44, I45, I47-I49' -> ['I44', 'I45', 'I47', 'I48', 'I49']; ranges run over three-character categories,
+    # and may cross letters ('S00-T98')
+    expanded = []
+    for part in str(codes).split(','):
+        part = part.strip().upper()
+        if not part:
+            continue
+        match = _RANGE.match(part)
+        if match is None:
+            expanded.append(normalize_code(part))
+            continue
+        first = (ord(match.group(1)) - ord('A')) * 100 + int(match.group(2))
+        last = (ord(match.group(3)) - ord('A')) * 100 + int(match.group(4))
+        expanded.extend(f"{chr(ord('A') + n // 100)}{n % 100:02d}" for n in range(first, last + 1))
+    return expanded
+
+
+def _postings(values):
+    codes, uniques = pd.factorize(pd.Series(values), sort=False)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)}
+
+
+def build_index(underlying_conditions_df):
+    rows = {column: underlying_conditions_df[column].to_numpy(dtype=object) for column in DISPLAY_COLUMNS}
+    postings = {name: _postings(rows[column]) for name, column in FILTER_COLUMNS.items()}
+    condition_codes, conditions = pd.factorize(underlying_conditions_df['Condition'], sort=False)
+
+    first_rows = pd.Series(np.arange(len(condition_codes))).groupby(condition_codes).first()
+    pairs = sorted({(code, condition) for condition, row in first_rows.items() if condition >= 0
+                    for code in expand_icd10(rows['ICD10_codes'][row])})
+    return ConditionsIndex(
+        rows=rows,
+        deaths=underlying_conditions_df[DEATHS_COLUMN].to_numpy(dtype=float),
+        postings=postings,
+        conditions=list(conditions),
+        condition_codes=condition_codes,
+        icd_codes=[code for code, _ in pairs],
+        icd_conditions=np.array([condition for _, condition in pairs], dtype=np.int64),
+    )
+
+
+def _union(arrays):
+    # Postings of different values of one column are disjoint
+    if len(arrays) == 1:
+        return arrays[0]
+    return np.sort(np.concatenate(arrays)) if arrays else np.zeros(0, dtype=np.int64)
+
+
+def icd10_conditions(index, prefix):
+    # Conditions with at least one ICD-10 code starting with ``prefix``, plus those listing a less specific
+    # code that contains it: 'J12.1' matches the category J12, which the CDC table lists as part of J09-J18
+    prefix = normalize_code(prefix)
+    start = bisect.bisect_left(index.icd_codes, prefix)
+    stop = bisect.bisect_left(index.icd_codes, prefix + '\uffff', lo=start)
+    matched = [index.icd_conditions[start:stop]]
+    for length in range(3, len(prefix)):
+        first = bisect.bisect_left(index.icd_codes, prefix[:length])
+        last = bisect.bisect_right(index.icd_codes, prefix[:length], lo=first)
+        matched.append(index.icd_conditions[first:last])
+    return np.unique(np.concatenate(matched))
+
+
+def query(index, icd10_prefix=None, **filters):
+    # ``filters`` maps FILTER_COLUMNS names to a value or a list of values; empty or None means no filter.
+    # Returns the sorted matching row positions.
+    selections = []
+    for name, values in filters.items():
+        if name not in index.postings:
+            raise ValueError(f"Unknown filter {name!r}, expected one of {list(index.postings)}")
+        if values is None or values == []:
+            continue
+        if not isinstance(values, (list, tuple)):
+            values = [values]
+        empty = np.zeros(0, dtype=np.int64)
+        selections.append(_union([index.postings[name].get(value, empty) for value in values]))
+    if icd10_prefix and normalize_code(icd10_prefix):
+        postings = index.postings['condition']
+        selections.append(_union([postings[index.conditions[code]]
+                                  for code in icd10_conditions(index, icd10_prefix)]))
+    if not selections:
+        return np.arange(len(index.deaths))
+    # Intersect smallest first so every step is bounded by the most selective filter
+    selections.sort(key=len)
+    matched = selections[0]
+    for selection in selections[1:]:
+        if not len(matched):
+            break
+        matched = np.intersect1d(matched, selection, assume_unique=True)
+    return matched
+
+
+def deaths_by_condition(index, matched):
+    codes = index.condition_codes[matched]
+    totals = np.bincount(codes, weights=index.deaths[matched], minlength=len(index.conditions))
+    present = np.bincount(codes, minlength=len(index.conditions)) > 0
+    return [(index.conditions[code], totals[code]) for code in np.flatnonzero(present)]
@@ -0,0 +1,67 @@
+import hashlib
+
+from flask import Response, g, request
+
+import cdc_data
+import tracker
+from persistent_cache import code_version
+
+# A data version names exactly what the app is serving: the code, the CDC CSV files (by size and mtime, so
+# computing it never loads them) and the tracker data (its latest date plus a digest of the raw API
+# payloads). Anything derived from the data (HTTP responses, in-process and on-disk caches) is keyed on it, so
+# it only has to be recomputed or re-sent when it changes.
+
+# Only responses that are a pure function of (data version, request) may be revalidated. All of them carry
+# the X-Data-Version header, but only GET and HEAD get an ETag and 304s: a POST (a Dash callback) is not a
+# conditional request, so it always runs and returns its payload.
+conditional_methods = ('GET', 'HEAD')
+versioned_prefixes = ('/_dash-layout', '/_dash-dependencies', '/_dash-update-component', '/api/')
+
+_current = (None, None)
+
+
+def current():
+    global _current
+    data = tracker.current()
+    tracker_version, version = _current
+    if tracker_version != data.version:
+        sha1 = hashlib.sha1()
+        for part in (code_version(), cdc_data.files_signature(), data.digest or '', str(data.last_updated_date)):
+            sha1.update(part.encode('utf-8') + b'\0')
+        version = data.last_updated_date.strftime('%Y%m%d') + '-' + sha1.hexdigest()[:16]
+        _current = (data.version, version)
+    return version
+
+
+def request_etag(version):
+    sha1 = hashlib.sha1(version.encode('utf-8'))
+    # HEAD shares the ETag of the GET it describes
+    sha1.update(request.full_path.encode('utf-8'))
+    return sha1.hexdigest()[:32]
+
+
+def init_app(server):
+    @server.before_request
+    def check_not_modified():
+        if request.method not in conditional_methods + ('POST',) or not request.path.startswith(versioned_prefixes):
+            return None
+        g.data_version = current()
+        if request.method not in conditional_methods:
+            return None
+        g.etag = request_etag(g.data_version)
+        if request.if_none_match.contains_weak(g.etag):
+            response = Response(status=304)
+            response.set_etag(g.etag, weak=True)
+            return response
+        return None
+
+    @server.after_request
+    def add_version_headers(response):
+        if g.get('data_version') is not None:
+            response.headers['X-Data-Version'] = g.data_version
+        etag = g.get('etag')
+        if etag is not None and response.status_code == 200:
+            response.set_etag(etag, weak=True)
+            # Let browsers and CDNs keep the payload but revalidate it on every use
+            response.headers['Cache-Control'] = 'no-cache'
+        return response
@@ -0,0 +1,138 @@
+import collections
+
+import numpy as np
+import pandas as pd
+
+# Shared, integer-coded dimensions for the two CDC tables, which name states, sexes and age groups
+# differently. Both are mapped onto these codes once at load and pre-aggregated into dense arrays, so every
+# lookup afterwards is an integer-indexed array read rather than a string filter over the rows.
+
+State = collections.namedtuple('State', ['name', 'abbrev'])
+
+NATIONAL = State('United States', 'US')
+STATES = [NATIONAL] + [State(name, abbrev) for name, abbrev in [
+    ('Alabama', 'AL'), ('Alaska', 'AK'), ('Arizona', 'AZ'), ('Arkansas', 'AR'), ('California', 'CA'),
+    ('Colorado', 'CO'), ('Connecticut', 'CT'), ('Delaware', 'DE'), ('District of Columbia', 'DC'),
+    ('Florida', 'FL'), ('Georgia', 'GA'), ('Hawaii', 'HI'), ('Idaho', 'ID'), ('Illinois', 'IL'),
+    ('Indiana', 'IN'), ('Iowa', 'IA'), ('Kansas', 'KS'), ('Kentucky', 'KY'), ('Louisiana', 'LA'),
+    ('Maine', 'ME'), ('Maryland', 'MD'), ('Massachusetts', 'MA'), ('Michigan', 'MI'), ('Minnesota', 'MN'),
+    ('Mississippi', 'MS'), ('Missouri', 'MO'), ('Montana', 'MT'), ('Nebraska', 'NE'), ('Nevada', 'NV'),
+    ('New Hampshire', 'NH'), ('New Jersey', 'NJ'), ('New Mexico', 'NM'), ('New York', 'NY'),
+    ('North Carolina', 'NC'), ('North Dakota', 'ND'), ('Ohio', 'OH'), ('Oklahoma', 'OK'), ('Oregon', 'OR'),
+    ('Pennsylvania', 'PA'), ('Rhode Island', 'RI'), ('South Carolina', 'SC'), ('South Dakota', 'SD'),
+    ('Tennessee', 'TN'), ('Texas', 'TX'), ('Utah', 'UT'), ('Vermont', 'VT'), ('Virginia', 'VA'),
+    ('Washington', 'WA'), ('West Virginia', 'WV'), ('Wisconsin', 'WI'), ('Wyoming', 'WY'),
+    ('Puerto Rico', 'PR'), ('New York City', 'YC'),
+]]
+
+SEXES = ['All Sexes', 'Male', 'Female', 'Unknown']
+
+# A bucket is the sum of the listed age groups of each table (``value`` is what the calculator and the batch
+# API accept). A new bucket, e.g. 65+, only needs a new entry here.
+AgeBucket = collections.namedtuple('AgeBucket', ['label', 'value', 'age_sex_groups', 'condition_groups'])
+
+ALL_AGES = AgeBucket('All Ages', 'All Ages', ['All Ages'], ['All Ages'])
+AGE_BUCKETS = [
+    ALL_AGES,
+    AgeBucket('0-24', '0-24 years', ['Under 1 year', '1-4 years', '5-14 years', '15-24 years'], ['0-24']),
+    AgeBucket('25-34', '25-34 years', ['25-34 years'], ['25-34']),
+    AgeBucket('35-44', '35-44 years', ['35-44 years'], ['35-44']),
+    AgeBucket('45-54', '45-54 years', ['45-54 years'], ['45-54']),
+    AgeBucket('55-64', '55-64 years', ['55-64 years'], ['55-64']),
+    AgeBucket('65-74', '65-74 years', ['65-74 years'], ['65-74']),
+    AgeBucket('75-84', '75-84 years', ['75-84 years'], ['75-84']),
+    AgeBucket('85+', '85 years and over', ['85 years and over'], ['85+']),
+]
+# The buckets offered by the survival rate calculator
+calculator_age_buckets = AGE_BUCKETS[1:]
+
+Dimensions = collections.namedtuple('Dimensions', [
+    'states', 'sexes', 'age_buckets', 'condition_groups',
+    'state_codes',  # state name or abbreviation -> code
+    'deaths',  # float [state, sex, age bucket] COVID-19 deaths; NaN where the CDC table has no row
+    'condition_deaths',  # float [state, age bucket, condition group] COVID-19 deaths with the condition
+])
+
+
+def state_code_map(states=STATES):
+    codes = {}
+    for code, state in enumerate(states):
+        codes[state.name] = code
+        codes[state.abbrev] = code
+    return codes
+
+
+def _codes(values, vocabulary):
+    return pd.Index(vocabulary).get_indexer(pd.Index(values, dtype=object))
+
+
+def _rollup(fine, sources, source_groups, axis):
+    # Sum the fine-grained age groups of each bucket along ``axis``; a bucket with no data at all stays NaN
+    positions = {group: i for i, group in enumerate(sources)}
+    buckets = []
+    for groups in source_groups:
+        parts = np.take(fine, [positions[group] for group in groups], axis=axis)
+        total = np.nansum(parts, axis=axis)
+        total[np.isnan(parts).all(axis=axis)] = np.nan
+        buckets.append(total)
+    return np.stack(buckets, axis=axis)
+
+
+def build_dimensions(age_sex_state_df, underlying_conditions_df, age_buckets=AGE_BUCKETS):
+    state_codes = state_code_map()
+
+    age_sex_sources = sorted({g for bucket in age_buckets for g in bucket.age_sex_groups})
+    state = pd.Series(age_sex_state_df['State']).map(state_codes).fillna(-1).to_numpy(dtype=np.int64)
+    sex = _codes(age_sex_state_df['Sex'], SEXES)
+    age = _codes(age_sex_state_df['Age group'], age_sex_sources)
+    keep = (state >= 0) & (sex >= 0) & (age >= 0)
+    fine = np.full((len(STATES), len(SEXES), len(age_sex_sources)), np.nan)
+    fine[state[keep], sex[keep], age[keep]] = age_sex_state_df['COVID-19 Deaths'].to_numpy(dtype=float)[keep]
+    deaths = _rollup(fine, age_sex_sources, [b.age_sex_groups for b in age_buckets], axis=2)
+
+    condition_sources = sorted({g for bucket in age_buckets for g in bucket.condition_groups})
+    group_codes, condition_groups = pd.factorize(underlying_conditions_df['Condition Group'])
+    state = pd.Series(underlying_conditions_df['State']).map(state_codes).fillna(-1).to_numpy(dtype=np.int64)
+    age = _codes(underlying_conditions_df['Age Group'], condition_sources)
+    keep = (state >= 0) & (age >= 0) & (group_codes >= 0)
+    fine = np.zeros((len(STATES), len(condition_sources), len(condition_groups)))
+    np.add.at(fine, (state[keep], age[keep], group_codes[keep]),
+              underlying_conditions_df['Number of COVID-19 Deaths'].to_numpy(dtype=float)[keep])
+    condition_deaths = np.nan_to_num(
+        _rollup(fine, condition_sources, [b.condition_groups for b in age_buckets], axis=1))
+
+    return Dimensions(
+        states=list(STATES), sexes=list(SEXES), age_buckets=list(age_buckets),
+        condition_groups=list(condition_groups), state_codes=state_codes, deaths=deaths,
+        condition_deaths=condition_deaths,
+    )
+
+
+def _long_form(values, axes, value_column):
+    # One row per cell of ``values``; ``axes`` lists, per dimension, {column: labels in code order}
+    positions = np.indices(values.shape).reshape(values.ndim, -1)
+    columns = {}
+    for axis, labels in enumerate(axes):
+        for column, names in labels.items():
+            columns[column] = np.asarray(names, dtype=object)[positions[axis]]
+    columns[value_column] = values.ravel()
+    return pd.DataFrame(columns)
+
+
+def _state_axis(dims):
+    return {'State': [state.name for state in dims.states],
+            'State Abbreviation': [state.abbrev for state in dims.states]}
+
+
+def deaths_frame(dims):
+    # ``deaths`` as rows of (state, sex, age bucket); NaN deaths where the CDC table has no row
+    return _long_form(dims.deaths, [_state_axis(dims), {'Sex': dims.sexes},
+                                    {'Age Bucket': [bucket.label for bucket in dims.age_buckets]}], 'COVID-19 Deaths')
+
+
+def condition_deaths_frame(dims):
+    # ``condition_deaths`` as rows of (state, age bucket, condition group)
+    return _long_form(dims.condition_deaths, [_state_axis(dims),
+                                              {'Age Bucket': [bucket.label for bucket in dims.age_buckets]},
+                                              {'Condition Group': dims.condition_groups}],
+                      'Number of COVID-19 Deaths')
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+# Label -> integer code encoding shared by the calculator and the pre-screener. Every invalid input is a
+# ValueError naming the offending row, which the batch API turns into a 400.
+
+
+def check_types(values, name, kind, rows=None):
+    # Labels must be strings and masks integers (not bools); infer_dtype checks the common case in C
+    if pd.api.types.infer_dtype(values, skipna=False) in (kind, 'empty'):
+        return
+    expected, description = (str, 'a string') if kind == 'string' else (int, 'an integer')
+    for position, value in enumerate(values):
+        if not isinstance(value, expected) or isinstance(value, bool):
+            row = position if rows is None else int(rows[position])
+            raise ValueError(f"Invalid {name} {value!r} at row {row}, expected {description}")
+
+
+def _unknown(values, codes, name, rows=None):
+    position = int(np.argmax(codes < 0))
+    row = position if rows is None else int(rows[position])
+    return ValueError(f"Unknown {name} {values[position]!r} at row {row}")
+
+
+def encode(values, vocabulary, name, rows=None):
+    check_types(values, name, 'string', rows)
+    codes = pd.Index(vocabulary).get_indexer(pd.Index(values, dtype=object))
+    if len(codes) and codes.min() < 0:
+        raise _unknown(values, codes, name, rows)
+    return codes
+
+
+def encode_ragged(value_lists, vocabulary, name):
+    # (rows, codes) of every label in ragged lists of labels, flattened without a per-row Python loop
+    lengths = np.fromiter((len(values) for values in value_lists), dtype=np.int64, count=len(value_lists))
+    rows = np.repeat(np.arange(len(value_lists)), lengths)
+    return rows, encode([value for values in value_lists for value in values], vocabulary, name, rows)
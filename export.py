@@ -0,0 +1,154 @@
+import collections
+
+import pandas as pd
+from flask import Blueprint, Response, jsonify, request
+
+import dataversion
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # CSV exports still work without it
+    pa = pq = None
+
+# Prepared data for downstream jobs, streamed in chunks of CHUNK_ROWS rows:
+#
+#   GET /api/v1/export                                  datasets, their columns and the formats
+#   GET /api/v1/export/<dataset>.<csv|arrow|parquet>?start=2020-06-01&end=2020-06-30&columns=date,positive
+#
+# ``start``/``end`` are inclusive dates on the dataset's date column. Like every /api/ response these carry
+# the data version as a weak ETag (see dataversion.py), so unchanged exports revalidate with a 304.
+CHUNK_ROWS = 8192
+
+# ``frame`` returns the DataFrame to export (called per request, so tracker data is always the current one);
+# ``date_column`` is the column range queries apply to, None if the dataset has no dates
+Dataset = collections.namedtuple('Dataset', ['frame', 'date_column'])
+
+FORMATS = {
+    'csv': 'text/csv',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+class _ChunkSink:
+    # Write-only file object for pyarrow writers; what they wrote so far is taken out after every chunk, so
+    # the response never holds more than about one chunk
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def _chunks(df):
+    for start in range(0, len(df), CHUNK_ROWS):
+        yield df.iloc[start:start + CHUNK_ROWS]
+
+
+def _csv(df):
+    for number, chunk in enumerate(_chunks(df)):
+        yield chunk.to_csv(index=False, header=number == 0)
+    if not len(df):
+        yield df.to_csv(index=False)
+
+
+def _arrow(df, parquet=False):
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema) if parquet else pa.ipc.new_stream(sink, schema)
+    for chunk in _chunks(df):
+        batch = pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+        if parquet:
+            writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def _date(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        timestamp = pd.Timestamp(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be a date such as 2020-06-01, got {value!r}")
+    # The date columns are naive UTC, so '2020-06-01T00:00Z' or a '+02:00' offset compare in UTC
+    return timestamp if timestamp.tzinfo is None else timestamp.tz_convert(None)
+
+
+def select(df, date_column, start=None, end=None, columns=None):
+    if (start is not None or end is not None) and date_column is None:
+        raise ValueError("This dataset has no dates; 'start' and 'end' are not supported")
+    if columns:
+        unknown = [column for column in columns if column not in df.columns]
+        if unknown:
+            raise ValueError(f"Unknown columns {unknown}")
+    if start is not None or end is not None:
+        dates = df[date_column]
+        keep = pd.Series(True, index=df.index)
+        if start is not None:
+            keep &= dates >= start
+        if end is not None:
+            keep &= dates < end + pd.Timedelta(days=1)
+        df = df[keep]
+    if columns:
+        df = df[columns]
+    return df
+
+
+def create_blueprint(datasets):
+    export_api = Blueprint('export', __name__, url_prefix='/api/v1/export')
+
+    @export_api.errorhandler(ValueError)
+    def bad_request(error):
+        return jsonify(error=str(error)), 400
+
+    @export_api.route('')
+    def index():
+        formats = [name for name in FORMATS if name == 'csv' or pa is not None]
+        return jsonify(formats=formats, datasets={
+            name: {'columns': [str(column) for column in dataset.frame().columns],
+                   'date_column': dataset.date_column}
+            for name, dataset in datasets.items()})
+
+    @export_api.route('/<name>.<fmt>')
+    def export(name, fmt):
+        if name not in datasets:
+            return jsonify(error=f"Unknown dataset {name!r}, expected one of {list(datasets)}"), 404
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}, expected one of {list(FORMATS)}")
+        if fmt != 'csv' and pa is None:
+            raise ValueError(f"The {fmt} format needs pyarrow, which is not installed; use csv")
+        columns = [column for column in request.args.get('columns', '').split(',') if column]
+        dataset = datasets[name]
+        df = select(dataset.frame(), dataset.date_column, _date('start'), _date('end'), columns)
+        chunks = _csv(df) if fmt == 'csv' else _arrow(df, parquet=fmt == 'parquet')
+        response = Response(chunks, mimetype=FORMATS[fmt])
+        response.headers['Content-Disposition'] = f'attachment; filename="{name}-{dataversion.current()}.{fmt}"'
+        return response
+
+    return export_api
@@ -0,0 +1,33 @@
+import os
+
+# Concurrent serving mode: gthread (default) or gevent workers keep one slow client or slow callback from
+# blocking a whole process. GUNICORN_WORKER_CLASS=sync restores the old one-request-per-process model.
+bind = '0.0.0.0:' + os.environ.get('PORT', '8000')
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '100'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+keepalive = 5
+
+
+def post_worker_init(worker):
+    # Each worker refreshes its own copy of the tracker data in the background. Imported here rather than at
+    # the top so the master never loads requests/ssl before gevent gets to monkey-patch them.
+    import tracker
+    tracker.start_background_refresh(int(os.environ.get('TRACKER_REFRESH_SECONDS', '3600')))
+
+    # Tell the profilers which worker really runs; command line flags such as -k sync override the settings
+    # above. A gthread worker with one thread serves one request at a time, like a sync worker.
+    import profiling
+    from gunicorn.workers.gthread import ThreadWorker
+    from gunicorn.workers.sync import SyncWorker
+    description = type(worker).__name__
+    if isinstance(worker, SyncWorker):
+        concurrent = False
+    elif isinstance(worker, ThreadWorker):
+        concurrent = worker.cfg.threads > 1
+        description += f" with {worker.cfg.threads} thread(s)"
+    else:
+        concurrent = True
+    profiling.set_worker(description, concurrent, worker.cfg.timeout)
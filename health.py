@@ -0,0 +1,104 @@
+import datetime
+import os
+import time
+
+from flask import Blueprint, Response, jsonify
+
+import cdc_data
+import metrics
+import tracker
+import validation
+
+# Freshness and pipeline performance, for load balancers, alerting and dashboards:
+#
+#   GET /healthz   JSON status and the latest data validation reports; 503 while there is no tracker data or it
+#                  is older than stale_after seconds
+#   GET /metrics   Prometheus text: data age, stage durations, payload sizes, cache hits/misses, data issues
+#
+# Neither triggers a fetch or a load. Data age counts from the last successful fetch; the age of the newest
+# date in the data is reported separately, as the upstream source can stop publishing while fetches succeed.
+stale_after = int(os.environ.get('HEALTHZ_STALE_SECONDS', str(3 * 3600)))
+
+
+def _date_age(date, now):
+    return now - time.mktime(date.timetuple()) if isinstance(date, datetime.date) else None
+
+
+def cache_hit_rates():
+    totals = {}
+    for (name, labels), value in metrics.counters().items():
+        if name == 'app_cache_requests_total':
+            labels = dict(labels)
+            hits, requests = totals.get(labels['namespace'], (0, 0))
+            totals[labels['namespace']] = (hits + (value if labels['result'] == 'hit' else 0), requests + value)
+    return {namespace: {'hits': hits, 'requests': requests, 'hit_rate': hits / requests}
+            for namespace, (hits, requests) in sorted(totals.items())}
+
+
+def status():
+    now = time.time()
+    data = tracker.loaded()
+    error = tracker.last_refresh_error
+    report = {
+        'status': 'ok',
+        'tracker': None,
+        'last_refresh_error': None if error is None else {'at': error[0], 'message': error[1]},
+        'cdc_data_loaded': cdc_data.loaded() is not None,
+        'stages': metrics.durations(),
+        'caches': cache_hit_rates(),
+        # Full reports, with sample row positions for every issue, plus the one-line summary
+        'validation': {dataset: dict(validation.report_as_dict(report), summary=validation.format_issues(report))
+                       for dataset, report in sorted(validation.last_reports.items())},
+    }
+    if data is None:
+        report['status'] = 'no_data'
+        return report
+    age = now - data.fetched_at
+    report['tracker'] = {
+        'version': data.version,
+        'digest': data.digest,
+        'fetched_at': data.fetched_at,
+        'age_seconds': age,
+        'last_updated_date': str(data.last_updated_date),
+        'last_updated_age_seconds': _date_age(data.last_updated_date, now),
+    }
+    if age > stale_after:
+        report['status'] = 'stale'
+    elif error is not None:
+        # Still serving good data, but the last refresh failed
+        report['status'] = 'degraded'
+    return report
+
+
+def scrape_gauges():
+    now = time.time()
+    gauges = [('tracker_last_refresh_failed', {}, int(tracker.last_refresh_error is not None)),
+              ('cdc_data_loaded', {}, int(cdc_data.loaded() is not None)),
+              ('healthz_stale_after_seconds', {}, stale_after)]
+    data = tracker.loaded()
+    if data is not None:
+        gauges.append(('tracker_data_age_seconds', {}, now - data.fetched_at))
+        last_updated_age = _date_age(data.last_updated_date, now)
+        if last_updated_age is not None:
+            gauges.append(('tracker_last_updated_date_age_seconds', {}, last_updated_age))
+    for dataset, report in validation.last_reports.items():
+        gauges.append(('data_validation_rows', {'dataset': dataset}, report.rows))
+        for issue in report.issues:
+            gauges.append(('data_validation_issues', {'dataset': dataset, 'check': issue.check,
+                                                      'column': issue.column}, issue.count))
+    return gauges
+
+
+def create_blueprint():
+    health = Blueprint('health', __name__)
+
+    @health.route('/healthz')
+    def healthz():
+        report = status()
+        return jsonify(report), 503 if report['status'] in ('no_data', 'stale') else 200
+
+    @health.route('/metrics')
+    def prometheus_metrics():
+        return Response(metrics.render(scrape_gauges()), mimetype='text/plain; version=0.0.4')
+
+    return health
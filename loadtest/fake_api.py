@@ -0,0 +1,75 @@
+"""Local stand-in for api.covidtracking.com.
+
+Serves ``/v1/us/daily.json`` and ``/v1/states/daily.json`` from fixtures with
+configurable latency and failure injection:
+
+    python -m loadtest.fake_api --port 8099 --latency-ms 150 --jitter-ms 50 --failure-rate 0.02
+
+Point the app at it with ``COVIDTRACKING_API_URL=http://127.0.0.1:8099``.
+"""
+import argparse
+import json
+import random
+import time
+
+from flask import Flask, Response
+
+from loadtest import fixtures
+
+
+def create_app(us_daily, states_daily, latency_ms=0.0, jitter_ms=0.0, failure_rate=0.0, seed=None):
+    fake_api = Flask(__name__)
+    rng = random.Random(seed)
+    # Serialize once up front so the stand-in itself never becomes the bottleneck
+    payloads = {
+        'us': json.dumps(us_daily).encode('utf-8'),
+        'states': json.dumps(states_daily).encode('utf-8'),
+    }
+    stats = {'requests': 0, 'failures': 0}
+
+    def respond(name):
+        stats['requests'] += 1
+        delay = latency_ms + (rng.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        if failure_rate and rng.random() < failure_rate:
+            stats['failures'] += 1
+            return Response('{"error": "injected failure"}', status=503, mimetype='application/json')
+        return Response(payloads[name], mimetype='application/json')
+
+    @fake_api.route('/v1/us/daily.json')
+    def us_daily_json():
+        return respond('us')
+
+    @fake_api.route('/v1/states/daily.json')
+    def states_daily_json():
+        return respond('states')
+
+    @fake_api.route('/_stats')
+    def fake_api_stats():
+        return stats
+
+    return fake_api
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--fixtures-dir', help='directory with us_daily.json and states_daily.json '
+                                               '(default: generate synthetic fixtures)')
+    parser.add_argument('--days', type=int, default=300, help='days of synthetic history to generate')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='added delay per request')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='uniform +/- jitter around --latency-ms')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    args = parser.parse_args(argv)
+
+    us_daily, states_daily = fixtures.load(args.fixtures_dir, days=args.days, seed=args.seed)
+    fake_api = create_app(us_daily, states_daily, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                          failure_rate=args.failure_rate, seed=args.seed)
+    fake_api.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Fixture data in the shape of the covidtracking ``/v1/us/daily.json`` and
+``/v1/states/daily.json`` responses.
+
+Fixtures are either loaded from a directory holding ``us_daily.json`` and
+``states_daily.json`` (e.g. a saved copy of the real API) or generated
+deterministically from a seed, so runs are repeatable without network access.
+"""
+import datetime
+import json
+import os
+import random
+
+STATE_CODES = ['AK', 'AL', 'AR', 'AS', 'AZ', 'CA', 'CO', 'CT', 'DC', 'DE', 'FL', 'GA', 'GU', 'HI', 'IA', 'ID', 'IL',
+               'IN', 'KS', 'KY', 'LA', 'MA', 'MD', 'ME', 'MI', 'MN', 'MO', 'MP', 'MS', 'MT', 'NC', 'ND', 'NE', 'NH',
+               'NJ', 'NM', 'NV', 'NY', 'OH', 'OK', 'OR', 'PA', 'PR', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VA', 'VI',
+               'VT', 'WA', 'WI', 'WV', 'WY']
+
+FIRST_DATE = datetime.date(2020, 1, 22)
+
+
+def _date_int(day):
+    return int(day.strftime('%Y%m%d'))
+
+
+def generate(days=300, seed=0):
+    rng = random.Random(seed)
+    dates = [FIRST_DATE + datetime.timedelta(days=i) for i in range(days)]
+    states_daily = []
+    us_totals = {}
+    for state in STATE_CODES:
+        size = rng.uniform(0.05, 3.0)
+        reports_recovered = rng.random() > 0.15
+        positive = death = hospitalized = recovered = 0
+        for i, day in enumerate(dates):
+            wave = 1 + 0.8 * ((i % 120) / 120.0)
+            positive_increase = int(rng.expovariate(1.0) * 150 * size * wave * min(1.0, i / 60.0))
+            death_increase = int(positive_increase * rng.uniform(0.005, 0.03))
+            hospitalized_increase = int(positive_increase * rng.uniform(0.02, 0.08))
+            positive += positive_increase
+            death += death_increase
+            hospitalized += hospitalized_increase
+            recovered = int(positive * 0.6)
+            record = {
+                'date': _date_int(day),
+                'state': state,
+                'positive': positive,
+                'negative': positive * 9,
+                'pending': None,
+                'hospitalizedCurrently': hospitalized_increase * 5,
+                'hospitalizedCumulative': hospitalized,
+                'recovered': recovered if reports_recovered else None,
+                'death': death,
+                'hospitalized': hospitalized,
+                'totalTestResults': positive * 10,
+                'dataQualityGrade': 'A',
+                'positiveIncrease': positive_increase,
+                'negativeIncrease': positive_increase * 9,
+                'totalTestResultsIncrease': positive_increase * 10,
+                'deathIncrease': death_increase,
+                'hospitalizedIncrease': hospitalized_increase,
+                'hash': '%040x' % rng.getrandbits(160),
+            }
+            states_daily.append(record)
+
+            totals = us_totals.setdefault(day, dict.fromkeys(
+                ['positive', 'negative', 'death', 'hospitalized', 'recovered', 'totalTestResults',
+                 'positiveIncrease', 'negativeIncrease', 'deathIncrease', 'hospitalizedIncrease',
+                 'totalTestResultsIncrease'], 0))
+            for key in totals:
+                totals[key] += record[key] or 0
+
+    us_daily = []
+    for day in dates:
+        record = {'date': _date_int(day), 'states': len(STATE_CODES)}
+        record.update(us_totals[day])
+        record['hospitalizedCumulative'] = record['hospitalized']
+        record['hash'] = '%040x' % rng.getrandbits(160)
+        us_daily.append(record)
+
+    # The API lists the most recent day first
+    states_daily.sort(key=lambda r: (-r['date'], r['state']))
+    us_daily.reverse()
+    return us_daily, states_daily
+
+
+def load(fixtures_dir=None, days=300, seed=0):
+    if fixtures_dir:
+        with open(os.path.join(fixtures_dir, 'us_daily.json')) as f:
+            us_daily = json.load(f)
+        with open(os.path.join(fixtures_dir, 'states_daily.json')) as f:
+            states_daily = json.load(f)
+        return us_daily, states_daily
+    return generate(days=days, seed=seed)
@@ -0,0 +1,158 @@
+"""Scripted user journeys against a running instance of the app.
+
+Each journey replays what a browser does for one visit: fetch the page shell,
+the Dash layout and dependencies, then fire the same ``_dash-update-component``
+requests the front end sends for navigation and the form callbacks.
+"""
+import random
+import time
+
+import requests
+
+ROUTES = ['/covidtracker', '/covidprescanner', '/survivalratecalc', '/responderappreciation', '/covidinfo',
+          '/conditionexplorer']
+
+SYMPTOMS = ['Fever', 'Cough', 'Fatigue', 'Sputum', 'Muscle', 'Headache', 'Sore', 'Nausea', 'Diarrhea', 'Breathing',
+            'Chest', 'Confusion', 'Bluish', 'Age', 'Chronic']
+
+AGE_GROUPS = ['0-24 years', '25-34 years', '35-44 years', '45-54 years', '55-64 years', '65-74 years',
+              '75-84 years', '85 years and over']
+
+STATES = ['Alabama', 'California', 'District of Columbia', 'Florida', 'Illinois', 'New York', 'Puerto Rico', 'Texas',
+          'Washington', 'Wyoming']
+
+GENDERS = ['Male', 'Female', 'Unknown']
+
+DISEASES = ['Respiratory diseases', 'Circulatory diseases', 'Sepsis', 'Malignant neoplasms', 'Diabetes', 'Obesity',
+            'Alzheimer disease', 'Vascular and unspecified dementia', 'Renal failure',
+            'Intentional and unintentional injury, poisoning, and other adverse events',
+            'All other conditions and causes (residual)']
+
+COMPARE_VALUES = ['off', 'grid', 'age', 'state']
+
+EXPLORER_STATES = ['US', 'AL', 'CA', 'DC', 'FL', 'IL', 'NY', 'PR', 'TX', 'WA', 'WY', 'YC']
+
+EXPLORER_AGE_GROUPS = ['All Ages', '0-24', '25-34', '35-44', '45-54', '55-64', '65-74', '75-84', '85+']
+
+ICD10_PREFIXES = ['', 'J', 'J1', 'J12.1', 'I50', 'E1', 'U07']
+
+
+def callback_payload(outputs, inputs):
+    # Mirrors the request body dash-renderer builds for a callback
+    if len(outputs) == 1:
+        output = '{}.{}'.format(*outputs[0])
+        outputs_spec = {'id': outputs[0][0], 'property': outputs[0][1]}
+    else:
+        output = '..' + '...'.join('{}.{}'.format(*o) for o in outputs) + '..'
+        outputs_spec = [{'id': i, 'property': p} for i, p in outputs]
+    return {
+        'output': output,
+        'outputs': outputs_spec,
+        'inputs': [{'id': i, 'property': p, 'value': v} for i, p, v in inputs],
+        'changedPropIds': ['{}.{}'.format(inputs[0][0], inputs[0][1])],
+        'state': [],
+    }
+
+
+NAV_OUTPUTS = [('page-{}-link'.format(i), 'active') for i in range(1, 7)]
+
+
+class Journey:
+    def __init__(self, base_url, record, rng=None):
+        self.base_url = base_url.rstrip('/')
+        self.record = record
+        self.rng = rng or random.Random()
+        self.session = requests.Session()
+
+    def _timed(self, step, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=60, **kwargs)
+            ok = response.status_code < 400
+            size = len(response.content)
+        except requests.RequestException:
+            ok, size = False, 0
+        self.record(step, time.perf_counter() - start, ok, size)
+
+    def callback(self, step, outputs, inputs):
+        self._timed(step, 'POST', '/_dash-update-component', json=callback_payload(outputs, inputs))
+
+    def open_page(self, route):
+        self._timed('page-shell', 'GET', route)
+        self._timed('dash-layout', 'GET', '/_dash-layout')
+        self._timed('dash-dependencies', 'GET', '/_dash-dependencies')
+        self.callback('nav-toggle', NAV_OUTPUTS, [('url', 'pathname', route)])
+        self.callback('page-content' + route.replace('/', ':'), [('page-content', 'children')],
+                      [('url', 'pathname', route)])
+
+    def tracker(self):
+        self.open_page('/covidtracker')
+
+    def prescanner(self):
+        self.open_page('/covidprescanner')
+        selected = []
+        for symptom in self.rng.sample(SYMPTOMS, self.rng.randint(1, 6)):
+            selected.append(symptom)
+            self.callback('prescanner-form', [('switches-checklist-output', 'children')],
+                          [('switches-input', 'value', list(selected))])
+
+    def calculator(self):
+        self.open_page('/survivalratecalc')
+        profile = [AGE_GROUPS[0], STATES[0], GENDERS[0], []]
+        compare = 'off'
+        for _ in range(self.rng.randint(1, 5)):
+            field = self.rng.randrange(5)
+            if field == 0:
+                profile[0] = self.rng.choice(AGE_GROUPS)
+            elif field == 1:
+                profile[1] = self.rng.choice(STATES)
+            elif field == 2:
+                profile[2] = self.rng.choice(GENDERS)
+            elif field == 3:
+                profile[3] = self.rng.sample(DISEASES, self.rng.randint(0, 3))
+            else:
+                compare = self.rng.choice([value for value in COMPARE_VALUES if value != compare])
+            form = [('age-group-radioitems-input', 'value', profile[0]),
+                    ('state-dropdown-input', 'value', profile[1]),
+                    ('gender-radioitems-input', 'value', profile[2]),
+                    ('health-cond-checkbox-input', 'value', profile[3])]
+            # The result and the comparison both depend on the form, only the comparison on the compare choice
+            if field != 4:
+                self.callback('calculator-form', [('switches-calc-checklist-output', 'children')], form)
+            self.callback('calculator-compare:' + compare, [('calc-comparison-output', 'children')],
+                          [('compare-radioitems-input', 'value', compare)] + form)
+
+    def appreciation(self):
+        self.open_page('/responderappreciation')
+
+    def info(self):
+        self.open_page('/covidinfo')
+
+    def explorer(self):
+        self.open_page('/conditionexplorer')
+        filters = [['US'], ['All Ages'], [], [], '']
+        for _ in range(self.rng.randint(1, 5)):
+            field = self.rng.randrange(4)
+            if field == 0:
+                filters[0] = self.rng.sample(EXPLORER_STATES, self.rng.randint(0, 3))
+            elif field == 1:
+                filters[1] = self.rng.sample(EXPLORER_AGE_GROUPS, self.rng.randint(0, 2))
+            elif field == 2:
+                filters[2] = self.rng.sample(DISEASES, self.rng.randint(0, 2))
+            else:
+                filters[4] = self.rng.choice(ICD10_PREFIXES)
+            self.callback('explorer-form', [('explorer-output', 'children')],
+                          [('explorer-state-input', 'value', filters[0]),
+                           ('explorer-age_group-input', 'value', filters[1]),
+                           ('explorer-condition_group-input', 'value', filters[2]),
+                           ('explorer-condition-input', 'value', filters[3]),
+                           ('explorer-icd10-input', 'value', filters[4])])
+
+    # Rough traffic mix: most visitors land on the tracker
+    MIX = [('tracker', 45), ('prescanner', 15), ('calculator', 20), ('explorer', 5), ('appreciation', 5),
+           ('info', 10)]
+
+    def run_one(self):
+        names = [name for name, _ in self.MIX]
+        weights = [weight for _, weight in self.MIX]
+        getattr(self, self.rng.choices(names, weights)[0])()
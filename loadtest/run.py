@@ -0,0 +1,266 @@
+"""Throughput, tail latency and memory of the app versus gunicorn worker
+class and worker/thread counts.
+
+Starts the local covidtracking stand-in, then for every worker class in
+``--worker-classes`` and every ``WORKERSxTHREADS`` entry of ``--matrix`` boots
+``gunicorn app:server`` against it, drives the scripted journeys from
+``--clients`` concurrent users for ``--duration`` seconds and prints one report
+row per configuration, including the peak RSS of the whole gunicorn process
+tree:
+
+    python -m loadtest.run --matrix 1x1,2x1,4x1,2x4,4x4 --clients 16 --duration 30 --json results.json
+    python -m loadtest.run --worker-classes sync,gthread,gevent --matrix 2x1,2x4,4x4
+
+The thread count only applies to gthread; sync and gevent configurations are
+run once per worker count.
+
+Everything runs on 127.0.0.1; no network access is needed.
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+from loadtest.journeys import Journey
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def wait_until_up(url, process, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('process exited with code {} while starting'.format(process.returncode))
+        try:
+            if requests.get(url, timeout=2).status_code < 500:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError('{} did not come up within {}s'.format(url, timeout))
+
+
+def stop(process):
+    if process.poll() is None:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def start_fake_api(args):
+    command = [sys.executable, '-m', 'loadtest.fake_api', '--port', str(args.api_port),
+               '--latency-ms', str(args.api_latency_ms), '--jitter-ms', str(args.api_jitter_ms),
+               '--failure-rate', str(args.api_failure_rate), '--days', str(args.days)]
+    if args.fixtures_dir:
+        command += ['--fixtures-dir', args.fixtures_dir]
+    process = subprocess.Popen(command, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_until_up('http://127.0.0.1:{}/_stats'.format(args.api_port), process, timeout=60)
+    return process
+
+
+def start_app(args, worker_class, workers, threads, extra_args=(), extra_env=None):
+    env = dict(os.environ, COVIDTRACKING_API_URL='http://127.0.0.1:{}'.format(args.api_port))
+    env.update(extra_env or {})
+    command = [sys.executable, '-m', 'gunicorn', 'app:server', '--bind', '127.0.0.1:{}'.format(args.app_port),
+               '--worker-class', worker_class, '--workers', str(workers), '--threads', str(threads),
+               '--timeout', '120', '--log-level', 'warning'] + list(extra_args)
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env)
+    wait_until_up('http://127.0.0.1:{}/'.format(args.app_port), process, timeout=args.boot_timeout)
+    return process
+
+
+def _children(pid):
+    children = []
+    try:
+        for task in os.listdir('/proc/{}/task'.format(pid)):
+            with open('/proc/{}/task/{}/children'.format(pid, task)) as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return children
+
+
+def tree_rss_bytes(pid):
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open('/proc/{}/status'.format(current)) as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+        pending.extend(_children(current))
+    return total
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.peak = max(self.peak, tree_rss_bytes(self.pid))
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return self.peak
+
+
+def drive(base_url, clients, duration, warmup, seed):
+    samples = []
+    lock = threading.Lock()
+    measuring = threading.Event()
+    deadline = time.time() + warmup + duration
+
+    def record(step, elapsed, ok, size):
+        if measuring.is_set():
+            with lock:
+                samples.append((step, elapsed, ok, size))
+
+    def client(index):
+        journey = Journey(base_url, record, rng=random.Random(seed + index))
+        while time.time() < deadline:
+            journey.run_one()
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(warmup)
+    measuring.set()
+    started = time.time()
+    for thread in threads:
+        thread.join()
+    return samples, time.time() - started
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(s[1] for s in samples)
+    errors = sum(1 for s in samples if not s[2])
+    by_step = {}
+    for step, latency, ok, size in samples:
+        by_step.setdefault(step, []).append(latency)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'rps': len(samples) / elapsed if elapsed else 0.0,
+        'bytes': sum(s[3] for s in samples),
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+        'steps': {step: {'count': len(values),
+                         'p50_ms': percentile(sorted(values), 50) * 1000,
+                         'p99_ms': percentile(sorted(values), 99) * 1000}
+                  for step, values in sorted(by_step.items())},
+    }
+
+
+def print_report(rows):
+    header = '{:>16} {:>9} {:>7} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9}'.format(
+        'config', 'requests', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms', 'rss MB')
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        print('{:>16} {:>9} {:>7} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f}'.format(
+            row['config'], row['requests'], row['errors'], row['rps'], row['p50_ms'], row['p95_ms'], row['p99_ms'],
+            row['max_ms'], row['peak_rss_bytes'] / 2 ** 20))
+
+
+def parse_matrix(value):
+    configs = []
+    for item in value.split(','):
+        workers, threads = item.lower().split('x')
+        configs.append((int(workers), int(threads)))
+    return configs
+
+
+def expand_configs(worker_classes, matrix):
+    configs = []
+    for worker_class in worker_classes:
+        for workers, threads in matrix:
+            if worker_class != 'gthread':
+                threads = 1
+            if (worker_class, workers, threads) not in configs:
+                configs.append((worker_class, workers, threads))
+    return configs
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--matrix', type=parse_matrix, default=parse_matrix('1x1,2x1,4x1,2x4,4x4'),
+                        help='comma separated WORKERSxTHREADS list')
+    parser.add_argument('--worker-classes', type=lambda v: v.split(','), default=['gthread'],
+                        help='comma separated gunicorn worker classes (sync, gthread, gevent)')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent simulated users')
+    parser.add_argument('--duration', type=float, default=30.0, help='measured seconds per configuration')
+    parser.add_argument('--warmup', type=float, default=5.0, help='unmeasured seconds before each measurement')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--app-port', type=int, default=8050)
+    parser.add_argument('--api-port', type=int, default=8099)
+    parser.add_argument('--api-latency-ms', type=float, default=0.0)
+    parser.add_argument('--api-jitter-ms', type=float, default=0.0)
+    parser.add_argument('--api-failure-rate', type=float, default=0.0)
+    parser.add_argument('--fixtures-dir')
+    parser.add_argument('--days', type=int, default=300)
+    parser.add_argument('--boot-timeout', type=float, default=120.0)
+    parser.add_argument('--json', dest='json_path', help='also write the full results (incl. per-step) here')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    rows = []
+    fake_api = start_fake_api(args)
+    try:
+        for worker_class, workers, threads in expand_configs(args.worker_classes, args.matrix):
+            app_process = start_app(args, worker_class, workers, threads)
+            sampler = RssSampler(app_process.pid)
+            sampler.start()
+            try:
+                samples, elapsed = drive('http://127.0.0.1:{}'.format(args.app_port), args.clients, args.duration,
+                                         args.warmup, args.seed)
+            finally:
+                peak_rss = sampler.stop()
+                stop(app_process)
+            row = summarize(samples, elapsed)
+            row.update(config='{} {}x{}'.format(worker_class, workers, threads), worker_class=worker_class,
+                       workers=workers, threads=threads, peak_rss_bytes=peak_rss)
+            rows.append(row)
+    finally:
+        stop(fake_api)
+
+    print_report(rows)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import collections
+import contextlib
+import threading
+import time
+
+# In-process metrics: stage timings, counters and gauges, rendered in the Prometheus text format by health.py.
+# Every gunicorn worker keeps (and serves) its own, as each one refreshes and caches its own data.
+_lock = threading.Lock()
+_durations = {}  # stage -> [count, total seconds, last seconds, last finished at]
+_counters = collections.Counter()  # (name, labels) -> value
+_gauges = {}  # (name, labels) -> value
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def observe(stage, seconds):
+    with _lock:
+        entry = _durations.setdefault(stage, [0, 0.0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = seconds
+        entry[3] = time.time()
+
+
+@contextlib.contextmanager
+def span(stage, timings=None):
+    # Times the block as ``stage``; ``timings`` (a dict) also collects it, e.g. for one refresh's log line
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        observe(stage, seconds)
+        if timings is not None:
+            timings[stage] = round(seconds * 1000, 2)
+
+
+class Laps:
+    # Times the consecutive stages of one pipeline run: lap(stage) records the time since the previous lap
+    def __init__(self, prefix, timings=None):
+        self.prefix = prefix
+        self.timings = {} if timings is None else timings
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        stage = f"{self.prefix}.{stage}"
+        observe(stage, now - self.last)
+        self.timings[stage] = round((now - self.last) * 1000, 2)
+        self.last = now
+
+
+def count(name, value=1, **labels):
+    with _lock:
+        _counters[name, _labels(labels)] += value
+
+
+def set_gauge(name, value, **labels):
+    with _lock:
+        _gauges[name, _labels(labels)] = value
+
+
+def durations():
+    with _lock:
+        return {stage: {'count': entry[0], 'total_seconds': entry[1], 'last_seconds': entry[2],
+                        'last_finished_at': entry[3]}
+                for stage, entry in _durations.items()}
+
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+
+def gauges():
+    with _lock:
+        return dict(_gauges)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('%s="%s"' % (key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                          for key, value in labels) + '}'
+
+
+def render(extra_gauges=()):
+    # ``extra_gauges`` are (name, labels dict, value) computed at scrape time, e.g. data age
+    lines = []
+    stages = durations()
+    if stages:
+        lines.append('# TYPE app_stage_duration_seconds summary')
+        for stage, entry in sorted(stages.items()):
+            lines.append(f'app_stage_duration_seconds_sum{{stage="{stage}"}} {entry["total_seconds"]:.6f}')
+            lines.append(f'app_stage_duration_seconds_count{{stage="{stage}"}} {entry["count"]}')
+        lines.append('# TYPE app_stage_last_duration_seconds gauge')
+        for stage, entry in sorted(stages.items()):
+            lines.append(f'app_stage_last_duration_seconds{{stage="{stage}"}} {entry["last_seconds"]:.6f}')
+
+    by_name = collections.defaultdict(list)
+    for (name, labels), value in counters().items():
+        by_name[name, 'counter'].append((labels, value))
+    for (name, labels), value in gauges().items():
+        by_name[name, 'gauge'].append((labels, value))
+    for name, labels, value in extra_gauges:
+        by_name[name, 'gauge'].append((_labels(labels), value))
+    for (name, kind), samples in sorted(by_name.items()):
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(samples):
+            lines.append(f'{name}{_format_labels(labels)} {float(value)!r}')
+    return '\n'.join(lines) + '\n'
+
@@ -0,0 +1,132 @@
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+import plotly
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# On-disk cache of computed data (tracker snapshots with their figures, page layouts, calculator tables) so
+# that a restart with unchanged data skips the pandas/Plotly work. Entries are pickles under
+# <root>/<code version>/<namespace>/<key>.pickle, written to a temp file and renamed into place, so any
+# number of processes can share the directory. Setting APP_CACHE_DIR to an empty string disables it.
+root = os.environ.get('APP_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache'))
+max_bytes = int(os.environ.get('APP_CACHE_MAX_BYTES', str(256 * 2 ** 20)))
+
+_code_version = None
+
+
+def file_digest(paths):
+    sha1 = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha1.update(block)
+    return sha1.hexdigest()
+
+
+def code_version():
+    # The app's own sources plus the libraries whose objects end up in the cache
+    global _code_version
+    if _code_version is None:
+        here = os.path.dirname(os.path.abspath(__file__))
+        sha1 = hashlib.sha1(file_digest(sorted(glob.glob(os.path.join(here, '*.py')))).encode('utf-8'))
+        sha1.update(f"{np.__version__} {pd.__version__} {plotly.__version__}".encode('utf-8'))
+        _code_version = sha1.hexdigest()[:12]
+    return _code_version
+
+
+def _path(namespace, key):
+    return os.path.join(root, code_version(), namespace, key + '.pickle')
+
+
+def get(namespace, key):
+    if not root:
+        return None
+    path = _path(namespace, key)
+    try:
+        with open(path, 'rb') as f:
+            value = pickle.load(f)
+    except FileNotFoundError:
+        metrics.count('app_cache_requests_total', namespace=namespace, result='miss')
+        return None
+    except Exception:
+        logger.exception("Discarding unreadable cache entry %s", path)
+        _remove(path)
+        metrics.count('app_cache_requests_total', namespace=namespace, result='miss')
+        return None
+    metrics.count('app_cache_requests_total', namespace=namespace, result='hit')
+    # Recency for eviction
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return value
+
+
+def put(namespace, key, value):
+    if not root:
+        return
+    path = _path(namespace, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            _remove(tmp_path)
+            raise
+    except Exception:
+        logger.exception("Could not write cache entry %s", path)
+        return
+    evict()
+
+
+def get_or_build(namespace, key, build):
+    value = get(namespace, key)
+    if value is None:
+        value = build()
+        put(namespace, key, value)
+    return value
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def evict(limit=None):
+    # Drop least recently used entries, across all code versions, until the cache fits in ``limit`` bytes
+    limit = max_bytes if limit is None else limit
+    entries = []
+    for path in glob.glob(os.path.join(root, '*', '*', '*.pickle')):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= limit:
+            break
+        _remove(path)
+        total -= size
+    # Clean up emptied directories of other code versions; this version's stay in place for writers
+    current = os.path.join(root, code_version())
+    for directory in glob.glob(os.path.join(root, '*', '*')) + glob.glob(os.path.join(root, '*')):
+        if not directory.startswith(current):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
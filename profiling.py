@@ -0,0 +1,272 @@
+import collections
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+from flask import Blueprint, Response, abort, g, jsonify, request
+
+# Opt-in profiling of a live worker, all output as flamegraph-compatible collapsed stacks
+# ("frame;frame;frame <weight>" per line, for flamegraph.pl, speedscope, ...):
+#
+#   GET  /admin/profile/sample?seconds=10&interval_ms=5           sampling profile of every thread
+#   POST /admin/profile/callback?output=<id>.<prop>&count=1       cProfile the next matching Dash callback(s)
+#   POST /admin/tracemalloc/start, GET /admin/tracemalloc/diff, POST /admin/tracemalloc/stop
+#
+# Nothing is registered unless PROFILING_TOKEN is set, and every request must send it as X-Admin-Token.
+# The sampler only sees OS threads, so under gevent workers use the callback profiler instead. Both profilers
+# hold their request open while the worker serves others, so they are refused unless the running worker is
+# known to serve concurrent requests (see set_worker), and ``seconds`` stays below the worker timeout.
+token = os.environ.get('PROFILING_TOKEN', '')
+
+# Set by set_worker; until then the worker is unknown and the profilers are refused
+worker_description = None
+concurrent_worker = False
+MAX_SECONDS = max(1, int(os.environ.get('GUNICORN_TIMEOUT', '60')) - 10)
+MAX_STACK_DEPTH = 64
+# Bounds on collapsing a callback profile, see collapse_pstats
+MIN_STACK_FRACTION = 0.0005
+MAX_STACKS = 20000
+
+_armed_lock = threading.Lock()
+_armed = None
+
+
+def _frame_label(code, lineno=None):
+    filename = os.path.basename(code.co_filename)
+    if lineno is None:
+        return f"{code.co_name} ({filename})"
+    return f"{code.co_name} ({filename}:{lineno})"
+
+
+def _collapsed(counter):
+    lines = [f"{stack} {int(weight)}" for stack, weight in counter.most_common() if int(weight) > 0]
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain')
+
+
+def sample_stacks(seconds, interval):
+    stacks = collections.Counter()
+    sampler_id = threading.get_ident()
+    names = {}
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for thread in threading.enumerate():
+            names[thread.ident] = thread.name
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == sampler_id:
+                continue
+            labels = []
+            while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                labels.append(_frame_label(frame.f_code, frame.f_lineno))
+                frame = frame.f_back
+            labels.append(names.get(thread_id, str(thread_id)))
+            stacks[';'.join(reversed(labels))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def collapse_pstats(stats, min_fraction=MIN_STACK_FRACTION, max_stacks=MAX_STACKS):
+    # Turns cProfile's caller/callee graph into stacks, splitting a function's time between its callers in
+    # proportion to the time each call edge took (the approach flameprof uses). Weights are microseconds.
+    # The number of paths through the graph grows exponentially with its size, so a path is only followed
+    # while it carries at least ``min_fraction`` of the profile's total time, and at most ``max_stacks`` are
+    # walked (largest call edges first); the time of a path that is not followed stays with its caller.
+    callees = collections.defaultdict(list)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller].append((edge[3], func))
+    for edges in callees.values():
+        edges.sort(key=lambda edge: edge[0], reverse=True)
+    roots = [func for func, (_, _, _, _, callers) in stats.items() if not callers]
+    threshold = sum(stats[func][3] for func in roots) * min_fraction
+    stacks = collections.Counter()
+    budget = [max_stacks]
+
+    def walk(func, path, labels, inclusive):
+        # ``inclusive`` is the part of ``func``'s total time spent below this path
+        budget[0] -= 1
+        _, _, self_time, total_time, _ = stats[func]
+        own = min(self_time / total_time, 1.0) * inclusive
+        children = [(edge_time, callee) for edge_time, callee in callees[func]
+                    if callee not in path and stats[callee][3]]
+        # Edge times of recursive functions count nested calls more than once; scale them down so the
+        # stacks below a path never add up to more than the path's own time
+        scale = min(inclusive / total_time, (inclusive - own) / (sum(edge for edge, _ in children) or 1.0))
+        for edge_time, callee in children:
+            child = edge_time * scale
+            if len(labels) < MAX_STACK_DEPTH and child >= threshold and budget[0] > 0:
+                walk(callee, path | {callee}, labels + [_pstats_label(callee)], child)
+                inclusive -= child
+        # Whatever was not walked into (self time, pruned and recursive calls) stays with this frame
+        stacks[';'.join(labels)] += inclusive * 1e6
+
+    for func in roots:
+        if stats[func][3]:
+            walk(func, {func}, [_pstats_label(func)], stats[func][3])
+    return stacks
+
+
+def _pstats_label(func):
+    filename, lineno, name = func
+    if filename == '~':
+        return name
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+def _tracemalloc_stacks(baseline, snapshot):
+    stacks = collections.Counter()
+    for stat in snapshot.compare_to(baseline, 'traceback'):
+        if stat.size_diff > 0:
+            labels = [f"{os.path.basename(frame.filename)}:{frame.lineno}" for frame in stat.traceback]
+            stacks[';'.join(labels)] += stat.size_diff
+    return stacks
+
+
+class _ArmedCallback:
+    def __init__(self, output, count):
+        self.output = output
+        self.remaining = count
+        self.stats = None
+        self.profiled = 0
+        self.done = threading.Event()
+
+
+def _check_token():
+    supplied = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8')):
+        abort(403)
+
+
+def set_worker(description, concurrent, timeout=None):
+    # Called once the server is known: from gunicorn's post_worker_init (gunicorn.conf.py) with the worker
+    # that actually runs, whatever the command line or environment asked for, or by the development server
+    global worker_description, concurrent_worker, MAX_SECONDS
+    worker_description = description
+    concurrent_worker = concurrent
+    if timeout:
+        MAX_SECONDS = max(1, int(timeout) - 10)
+
+
+def _check_concurrent_worker():
+    if not concurrent_worker:
+        return jsonify(error=f"profiling needs a worker that serves concurrent requests, but this one is "
+                             f"{worker_description or 'unknown'}; use gthread workers with more than one "
+                             f"thread or gevent workers"), 409
+    return None
+
+
+def _bounded(name, default, upper):
+    value = request.args.get(name, default, type=float)
+    return min(max(value, 0.0), upper)
+
+
+def create_blueprint():
+    admin = Blueprint('profiling', __name__, url_prefix='/admin')
+    admin.before_request(_check_token)
+    state = {'tracemalloc_baseline': None}
+
+    @admin.route('/profile/sample')
+    def profile_sample():
+        refused = _check_concurrent_worker()
+        if refused is not None:
+            return refused
+        seconds = _bounded('seconds', 10, MAX_SECONDS)
+        interval = _bounded('interval_ms', 5, 1000) / 1000.0
+        return _collapsed(sample_stacks(seconds, max(interval, 0.001)))
+
+    @admin.route('/profile/callback', methods=['POST'])
+    def profile_callback():
+        global _armed
+        output = request.args.get('output')
+        if not output:
+            return jsonify(error="'output' (the callback's <component id>.<property>) is required"), 400
+        refused = _check_concurrent_worker()
+        if refused is not None:
+            return refused
+        count = max(1, request.args.get('count', 1, type=int))
+        seconds = _bounded('seconds', min(30, MAX_SECONDS), MAX_SECONDS)
+        armed = _ArmedCallback(output, count)
+        with _armed_lock:
+            if _armed is not None:
+                return jsonify(error="another callback profile is already running"), 409
+            _armed = armed
+        try:
+            armed.done.wait(seconds)
+        finally:
+            with _armed_lock:
+                _armed = None
+        if armed.stats is None:
+            return jsonify(error=f"no request for {output!r} arrived within {seconds:g}s"), 504
+        if request.args.get('format') == 'pstats':
+            text = io.StringIO()
+            armed.stats.stream = text
+            armed.stats.sort_stats('cumulative').print_stats(100)
+            return Response(f"{armed.profiled} request(s)\n" + text.getvalue(), mimetype='text/plain')
+        return _collapsed(collapse_pstats(armed.stats.stats))
+
+    @admin.route('/tracemalloc/start', methods=['POST'])
+    def tracemalloc_start():
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(request.args.get('frames', 25, type=int))
+        state['tracemalloc_baseline'] = tracemalloc.take_snapshot()
+        return jsonify(tracing=True)
+
+    @admin.route('/tracemalloc/diff')
+    def tracemalloc_diff():
+        if not tracemalloc.is_tracing() or state['tracemalloc_baseline'] is None:
+            return jsonify(error="tracemalloc is not running; POST /admin/tracemalloc/start first"), 409
+        snapshot = tracemalloc.take_snapshot()
+        stacks = _tracemalloc_stacks(state['tracemalloc_baseline'], snapshot)
+        if request.args.get('rebase'):
+            state['tracemalloc_baseline'] = snapshot
+        return _collapsed(stacks)
+
+    @admin.route('/tracemalloc/stop', methods=['POST'])
+    def tracemalloc_stop():
+        tracemalloc.stop()
+        state['tracemalloc_baseline'] = None
+        return jsonify(tracing=False)
+
+    return admin
+
+
+def _start_callback_profile():
+    armed = _armed
+    if armed is None or request.path != '/_dash-update-component':
+        return
+    payload = request.get_json(silent=True) or {}
+    if payload.get('output') != armed.output:
+        return
+    g.callback_profile = (armed, cProfile.Profile())
+    g.callback_profile[1].enable()
+
+
+def _stop_callback_profile(exc=None):
+    armed, profile = g.pop('callback_profile', (None, None))
+    if profile is None:
+        return
+    profile.disable()
+    with _armed_lock:
+        if armed.remaining <= 0:
+            return
+        if armed.stats is None:
+            armed.stats = pstats.Stats(profile)
+        else:
+            armed.stats.add(profile)
+        armed.profiled += 1
+        armed.remaining -= 1
+        if armed.remaining == 0:
+            armed.done.set()
+
+
+def init_app(server):
+    if not token:
+        return
+    server.register_blueprint(create_blueprint())
+    server.before_request(_start_callback_profile)
+    server.teardown_request(_stop_callback_profile)
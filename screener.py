@@ -0,0 +1,95 @@
+import numpy as np
+
+from encoding import encode_ragged
+
+symptoms_score_mapping = {
+    "Fever": 89,
+    "Cough": 68,
+    "Fatigue": 30,
+    "Sputum": 18,
+    "Muscle": 14,
+    "Headache": 16,
+    "Sore": 16,
+    "Nausea": 5,
+    "Diarrhea": 5,
+    "Breathing": 209,
+    "Chest": 209,
+    "Confusion": 209,
+    "Bluish": 209,
+    "Age": 52,
+    "Chronic": 52
+}
+emergency_symptom_list = ["Breathing", "Chest", "Confusion", "Bluish"]
+major_symptom_list = ["Fever", "Cough"]
+doctor_score_threshold = 209
+
+# Every screening ends in one of these (message, color) outcomes
+NO_TESTING, EMERGENCY_TESTING, EMERGENCY, TESTING = range(4)
+outcomes = [
+    ("Your symptoms indicate that currently you do not need COVID-19 testing. Please continue "
+     "to monitor your "
+     "health and practice social distancing. Avoid leaving the house unnecessarily. If you must "
+     "leave the "
+     "house, wear a mask or other face covering and stay at least 6 feet away from others.", "success"),
+    ("Your symptoms indicate that you should consult a doctor immediately for COVID-19 "
+     "testing. ", "danger"),
+    ("Your symptoms indicate that you should consult a doctor immediately.", "danger"),
+    ("Your symptoms indicate that you should consult a doctor immediately for COVID-19 "
+     "testing. ", "warning"),
+]
+
+# Each symptom is one bit of a 15-bit mask, so a screening is decided by a lookup into a table holding the
+# outcome for each of the 32,768 possible symptom combinations
+symptoms = list(symptoms_score_mapping)
+symptom_bits = {symptom: 1 << bit for bit, symptom in enumerate(symptoms)}
+symptom_weights = np.array([symptoms_score_mapping[s] for s in symptoms], dtype=np.int64)
+emergency_mask = sum(symptom_bits[s] for s in emergency_symptom_list)
+major_mask = sum(symptom_bits[s] for s in major_symptom_list)
+all_symptoms_mask = (1 << len(symptoms)) - 1
+
+
+def score_masks(masks):
+    masks = np.asarray(masks, dtype=np.int64)
+    bits = (masks[..., np.newaxis] >> np.arange(len(symptoms))) & 1
+    return bits @ symptom_weights
+
+
+def _build_outcome_table():
+    masks = np.arange(all_symptoms_mask + 1)
+    score = score_masks(masks)
+    any_emergency = (masks & emergency_mask) != 0
+    all_major = (masks & major_mask) == major_mask
+    return np.select(
+        [score < doctor_score_threshold, any_emergency & all_major, any_emergency],
+        [NO_TESTING, EMERGENCY_TESTING, EMERGENCY],
+        default=TESTING,
+    ).astype(np.uint8)
+
+
+outcome_table = _build_outcome_table()
+# bytes indexing is the cheapest single lookup from Python
+_outcome_bytes = outcome_table.tobytes()
+
+
+def encode_symptoms(switches_value):
+    mask = 0
+    for symptom in switches_value:
+        mask |= symptom_bits[symptom]
+    return mask
+
+
+def encode_symptom_masks(symptom_lists):
+    # Vectorized encode_symptoms over ragged lists, without a per-row Python loop
+    rows, bits = encode_ragged(symptom_lists, symptoms, 'symptom')
+    masks = np.zeros(len(symptom_lists), dtype=np.int64)
+    np.bitwise_or.at(masks, rows, np.left_shift(1, bits))
+    return masks
+
+
+def pre_screener_result(switches_value):
+    return outcomes[_outcome_bytes[encode_symptoms(switches_value)]]
+
+
+def pre_screener_outcomes(masks):
+    # Outcome index into ``outcomes`` for an array of symptom bitmasks
+    return outcome_table[masks]
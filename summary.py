@@ -0,0 +1,89 @@
+import collections
+
+import numpy as np
+import pandas as pd
+
+METRICS = ['positive', 'death', 'recovered', 'hospitalized']
+NATIONAL = 'US'
+
+# Summary aggregates, computed once per refresh and read by the cards, charts and APIs without any pandas
+# work. Regions are 'US' (national, from the us daily series) followed by every state; all series share one
+# ascending date axis and are laid out as float64 [region, date, metric].
+SummaryAggregates = collections.namedtuple('SummaryAggregates', [
+    'regions', 'dates', 'metrics',
+    'cumulative',  # forward-filled cumulative counts, 0 before a region's first report
+    'daily',  # day-over-day increase of ``cumulative``
+    'avg7', 'avg14',  # trailing 7/14-day means of ``daily`` (NaN until the window is full)
+    'growth7',  # week-over-week growth rate of ``avg7``
+    'latest',  # [region, metric] last reported cumulative value
+])
+
+
+def _scatter(region_codes, date_codes, values, n_regions, n_dates):
+    grid = np.full((n_regions, n_dates, values.shape[1]), np.nan)
+    grid[region_codes, date_codes] = values
+    return grid
+
+
+def _forward_fill(grid):
+    # Carry the last reported value forward along the date axis, per region and metric
+    reported = ~np.isnan(grid)
+    positions = np.where(reported, np.arange(grid.shape[1])[np.newaxis, :, np.newaxis], 0)
+    np.maximum.accumulate(positions, axis=1, out=positions)
+    filled = np.take_along_axis(grid, positions, axis=1)
+    return np.where(np.maximum.accumulate(reported, axis=1), filled, 0.0)
+
+
+def rolling_mean(daily, window):
+    # Cumulative-sum windowing: mean[t] = (csum[t] - csum[t - window]) / window
+    csum = np.concatenate([np.zeros_like(daily[:, :1]), np.cumsum(daily, axis=1)], axis=1)
+    mean = np.full_like(daily, np.nan)
+    mean[:, window - 1:] = (csum[:, window:] - csum[:, :-window]) / window
+    return mean
+
+
+def growth_rate(series, lag):
+    growth = np.full_like(series, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth[:, lag:] = series[:, lag:] / series[:, :-lag] - 1
+    growth[~np.isfinite(growth)] = np.nan
+    return growth
+
+
+def _values(df, metrics):
+    return np.column_stack([pd.to_numeric(df[m], errors='coerce').to_numpy(dtype=float) if m in df
+                            else np.full(len(df), np.nan) for m in metrics])
+
+
+def build_summary(us_historical_df, states_history_df, metrics=METRICS):
+    dates = np.union1d(us_historical_df['date'].to_numpy(dtype='datetime64[D]'),
+                       states_history_df['date'].to_numpy(dtype='datetime64[D]'))
+    state_codes, states = pd.factorize(states_history_df['state'], sort=True)
+    regions = [NATIONAL] + list(states)
+
+    grid = _scatter(
+        np.concatenate([np.zeros(len(us_historical_df), dtype=np.int64), state_codes + 1]),
+        np.searchsorted(dates, np.concatenate([us_historical_df['date'].to_numpy(dtype='datetime64[D]'),
+                                               states_history_df['date'].to_numpy(dtype='datetime64[D]')])),
+        np.concatenate([_values(us_historical_df, metrics), _values(states_history_df, metrics)]),
+        len(regions), len(dates))
+    cumulative = _forward_fill(grid)
+    daily = np.diff(cumulative, axis=1, prepend=0.0)
+    avg7 = rolling_mean(daily, 7)
+    return SummaryAggregates(
+        regions=regions, dates=dates, metrics=list(metrics), cumulative=cumulative, daily=daily,
+        avg7=avg7, avg14=rolling_mean(daily, 14), growth7=growth_rate(avg7, 7), latest=cumulative[:, -1],
+    )
+
+
+def series(aggregates, name, region, metric):
+    return getattr(aggregates, name)[aggregates.regions.index(region), :, aggregates.metrics.index(metric)]
+
+
+def latest_value(aggregates, name, region, metric):
+    return series(aggregates, name, region, metric)[-1]
+
+
+def states_total(aggregates, metric):
+    # Sum of every state's last reported value, the figure shown on the summary cards
+    return int(aggregates.latest[1:, aggregates.metrics.index(metric)].sum())
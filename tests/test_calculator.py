@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import calculator
+import cdc_data
+
+# The original app.py survival rate calculator, verbatim: its option lists, its CSV loading and its pandas
+# filters, kept as the reference for the dimension cubes behind calculator.SurvivalTables
+
+age_sex_state_df = pd.read_csv(cdc_data.AGE_SEX_STATE_CSV)
+age_sex_state_df['COVID-19 Deaths'] = age_sex_state_df['COVID-19 Deaths'].fillna(0)
+
+underlying_conditions_df = pd.read_csv(cdc_data.UNDERLYING_CONDITIONS_CSV)
+underlying_conditions_df['Number of COVID-19 Deaths'] = underlying_conditions_df['Number of COVID-19 Deaths'].fillna(0)
+
+age_map_multiple_dfs = {
+    '0-24 years': '0-24', '25-34 years': '25-34', '35-44 years': '35-44', '45-54 years': '45-54',
+    '55-64 years': '55-64', '65-74 years': '65-74', '75-84 years': '75-84',
+    '85 years and over': '85+'
+}
+
+unique_age_groups = ['0-24', '25-34', '35-44', '45-54', '55-64', '65-74', '75-84',
+                     '85+']
+
+unique_states = ['Alabama', 'Alaska', 'Arizona', 'Arkansas', 'California',
+                 'Colorado', 'Connecticut', 'Delaware', 'District of Columbia', 'Florida',
+                 'Georgia', 'Hawaii', 'Idaho', 'Illinois', 'Indiana', 'Iowa', 'Kansas',
+                 'Kentucky', 'Louisiana', 'Maine', 'Maryland', 'Massachusetts', 'Michigan',
+                 'Minnesota', 'Mississippi', 'Missouri', 'Montana', 'Nebraska', 'Nevada',
+                 'New Hampshire', 'New Jersey', 'New Mexico', 'New York',
+                 'North Carolina', 'North Dakota', 'Ohio', 'Oklahoma', 'Oregon', 'Pennsylvania',
+                 'Rhode Island', 'South Carolina', 'South Dakota', 'Tennessee', 'Texas', 'Utah',
+                 'Vermont', 'Virginia', 'Washington', 'West Virginia', 'Wisconsin', 'Wyoming',
+                 'Puerto Rico']
+
+us_state_abbrev = {
+    'Alabama': 'AL',
+    'Alaska': 'AK',
+    'Arizona': 'AZ',
+    'Arkansas': 'AR',
+    'California': 'CA',
+    'Colorado': 'CO',
+    'Connecticut': 'CT',
+    'Delaware': 'DE',
+    'District of Columbia': 'DC',
+    'Florida': 'FL',
+    'Georgia': 'GA',
+    'Hawaii': 'HI',
+    'Idaho': 'ID',
+    'Illinois': 'IL',
+    'Indiana': 'IN',
+    'Iowa': 'IA',
+    'Kansas': 'KS',
+    'Kentucky': 'KY',
+    'Louisiana': 'LA',
+    'Maine': 'ME',
+    'Maryland': 'MD',
+    'Massachusetts': 'MA',
+    'Michigan': 'MI',
+    'Minnesota': 'MN',
+    'Mississippi': 'MS',
+    'Missouri': 'MO',
+    'Montana': 'MT',
+    'Nebraska': 'NE',
+    'Nevada': 'NV',
+    'New Hampshire': 'NH',
+    'New Jersey': 'NJ',
+    'New Mexico': 'NM',
+    'New York': 'NY',
+    'North Carolina': 'NC',
+    'North Dakota': 'ND',
+    'Ohio': 'OH',
+    'Oklahoma': 'OK',
+    'Oregon': 'OR',
+    'Pennsylvania': 'PA',
+    'Puerto Rico': 'PR',
+    'Rhode Island': 'RI',
+    'South Carolina': 'SC',
+    'South Dakota': 'SD',
+    'Tennessee': 'TN',
+    'Texas': 'TX',
+    'Utah': 'UT',
+    'Vermont': 'VT',
+    'Virginia': 'VA',
+    'Washington': 'WA',
+    'West Virginia': 'WV',
+    'Wisconsin': 'WI',
+    'Wyoming': 'WY'
+}
+
+unique_diseases = ['Respiratory diseases', 'Circulatory diseases', 'Sepsis',
+                   'Malignant neoplasms', 'Diabetes', 'Obesity', 'Alzheimer disease',
+                   'Vascular and unspecified dementia', 'Renal failure',
+                   'Intentional and unintentional injury, poisoning, and other adverse events',
+                   'All other conditions and causes (residual)']
+
+
+def calc_death_rate_demographics(age_group_value, state_value, gender_value):
+    if age_group_value == '0-24 years':
+        deaths_under1_query_result = age_sex_state_df.loc[
+            (age_sex_state_df['Age group'] == "Under 1 year") & (age_sex_state_df['State'] == state_value) & (
+                    age_sex_state_df['Sex'] == gender_value), ['COVID-19 Deaths']].values[0].flat[0]
+        deaths_1to4_query_result = age_sex_state_df.loc[
+            (age_sex_state_df['Age group'] == "1-4 years") & (age_sex_state_df['State'] == state_value) & (
+                    age_sex_state_df['Sex'] == gender_value), ['COVID-19 Deaths']].values[0].flat[0]
+        deaths_5to14_query_result = age_sex_state_df.loc[
+            (age_sex_state_df['Age group'] == "5-14 years") & (age_sex_state_df['State'] == state_value) & (
+                    age_sex_state_df['Sex'] == gender_value), ['COVID-19 Deaths']].values[0].flat[0]
+        deaths_15to24_query_result = age_sex_state_df.loc[
+            (age_sex_state_df['Age group'] == "15-24 years") & (age_sex_state_df['State'] == state_value) & (
+                    age_sex_state_df['Sex'] == gender_value), ['COVID-19 Deaths']].values[0].flat[0]
+        deaths_query_result = deaths_under1_query_result + deaths_1to4_query_result + deaths_5to14_query_result + deaths_15to24_query_result
+    else:
+        deaths_query_result = age_sex_state_df.loc[
+            (age_sex_state_df['Age group'] == age_group_value) & (age_sex_state_df['State'] == state_value) & (
+                    age_sex_state_df['Sex'] == gender_value), ['COVID-19 Deaths']].values[0].flat[0]
+    total_us_deaths_query_result = age_sex_state_df.loc[
+        (age_sex_state_df['Age group'] == "All Ages") & (age_sex_state_df['State'] == "United States") & (
+                age_sex_state_df['Sex'] == "All Sexes"), ['COVID-19 Deaths']].values[0].flat[0]
+    death_rate_demographics = (deaths_query_result/total_us_deaths_query_result)*100
+    return death_rate_demographics
+
+
+def calc_death_rate_diseases(age_group_value, state_value, health_conditions_values):
+    state_code = us_state_abbrev[state_value]
+    age_group = age_map_multiple_dfs[age_group_value]
+    death_rate_all_conditions = 0
+    for condition in health_conditions_values:
+        condition_total_deaths = underlying_conditions_df.loc[
+            (underlying_conditions_df['Age Group'] == "All Ages") & (underlying_conditions_df['State'] == "US") & (
+                    underlying_conditions_df['Condition Group'] == condition), ['Number of COVID-19 Deaths']].values.sum()
+        deaths_query_result = underlying_conditions_df.loc[
+            (underlying_conditions_df['Age Group'] == age_group) & (
+                        underlying_conditions_df['State'] == state_code) & (
+                    underlying_conditions_df['Condition Group'] == condition), ['Number of COVID-19 Deaths']].values.sum()
+        conditional_death_rate = (deaths_query_result / condition_total_deaths) * 100
+        death_rate_all_conditions += conditional_death_rate
+    return death_rate_all_conditions
+
+age_group_values = [age_group + " years" if age_group != '85+' else "85 years and over"
+                    for age_group in unique_age_groups]
+genders = ["Male", "Female", "Unknown"]
+
+
+@pytest.fixture(scope='module')
+def tables():
+    return calculator.build_survival_tables(cdc_data.current().dimensions, unique_states, unique_diseases)
+
+
+def test_tables_cover_the_original_options(tables):
+    assert tables.age_groups == age_group_values
+    assert tables.states == unique_states
+    assert tables.genders == genders
+    assert tables.diseases == unique_diseases
+
+
+def test_demographic_rates_match_reference(tables):
+    expected = np.array([[[calc_death_rate_demographics(age_group, state, gender) for gender in genders]
+                          for state in unique_states] for age_group in age_group_values])
+    np.testing.assert_array_equal(tables.demographic_rates, expected)
+
+
+def test_disease_rates_match_reference(tables):
+    expected = np.array([[[calc_death_rate_diseases(age_group, state, [disease]) for disease in unique_diseases]
+                          for state in unique_states] for age_group in age_group_values])
+    np.testing.assert_array_equal(tables.disease_rates, expected)
+
+
+def test_survival_rates_match_reference(tables):
+    profiles = [(age_group, state, gender, unique_diseases[:count])
+                for age_group in age_group_values[::3] for state in unique_states[::7] for gender in genders
+                for count in (0, 1, 4)]
+    demographics, diseases, survival = calculator.survival_rates(tables, *map(list, zip(*profiles)))
+    for i, (age_group, state, gender, conditions) in enumerate(profiles):
+        # Diseases are summed in a different order than the reference loop, so allow for rounding
+        assert demographics[i] == calc_death_rate_demographics(age_group, state, gender)
+        assert diseases[i] == pytest.approx(calc_death_rate_diseases(age_group, state, conditions), rel=1e-12)
+        assert survival[i] == pytest.approx(100 - (demographics[i] + diseases[i]), rel=1e-12)
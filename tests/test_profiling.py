@@ -0,0 +1,98 @@
+import cProfile
+import pstats
+import threading
+import time
+
+import flask
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objs as go
+import pytest
+
+import profiling
+
+
+def serialize_figures():
+    # The kind of work a tracker callback does: aggregate, build Plotly figures and serialize them to JSON
+    df = pd.DataFrame({'date': pd.date_range('2020-03-01', periods=300), 'positiveIncrease': np.arange(300),
+                       'state': np.arange(300) % 5})
+    totals = df.groupby('state').sum(numeric_only=True)
+    px.bar(df, y='positiveIncrease', x='date', text='positiveIncrease').to_json()
+    go.Figure(go.Scatter(x=totals.index, y=totals['positiveIncrease'])).to_json()
+
+
+def test_collapse_of_plotly_serialization_profile_is_bounded():
+    profile = cProfile.Profile()
+    profile.enable()
+    serialize_figures()
+    profile.disable()
+    stats = pstats.Stats(profile).stats
+
+    result = {}
+    start = time.perf_counter()
+    worker = threading.Thread(target=lambda: result.update(stacks=profiling.collapse_pstats(stats)), daemon=True)
+    worker.start()
+    worker.join(10)
+    assert 'stacks' in result, f"collapsing {len(stats)} functions took more than 10s"
+    assert time.perf_counter() - start < 10
+
+    stacks = result['stacks']
+    assert 0 < len(stacks) <= profiling.MAX_STACKS
+    assert any('to_json' in stack for stack in stacks)
+    # Pruned paths keep their time with the caller, so the stacks add up to the profile's total time
+    total = sum(entry[3] for entry in stats.values() if not entry[4]) * 1e6
+    assert sum(stacks.values()) == pytest.approx(total, rel=1e-6)
+
+
+def test_collapse_splits_time_between_callers():
+    # main -> a -> leaf and main -> b -> leaf; leaf's 4s are split 1:3 between the two paths
+    main, a, b, leaf = ('app.py', 1, 'main'), ('app.py', 2, 'a'), ('app.py', 3, 'b'), ('app.py', 4, 'leaf')
+    stats = {
+        main: (1, 1, 1.0, 10.0, {}),
+        a: (1, 1, 1.0, 2.0, {main: (1, 1, 1.0, 2.0)}),
+        b: (1, 1, 4.0, 7.0, {main: (1, 1, 4.0, 7.0)}),
+        leaf: (2, 2, 4.0, 4.0, {a: (1, 1, 1.0, 1.0), b: (1, 1, 3.0, 3.0)}),
+    }
+    stacks = profiling.collapse_pstats(stats)
+    assert stacks == {
+        'main (app.py:1)': pytest.approx(1e6),
+        'main (app.py:1);a (app.py:2)': pytest.approx(1e6),
+        'main (app.py:1);a (app.py:2);leaf (app.py:4)': pytest.approx(1e6),
+        'main (app.py:1);b (app.py:3)': pytest.approx(4e6),
+        'main (app.py:1);b (app.py:3);leaf (app.py:4)': pytest.approx(3e6),
+    }
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setattr(profiling, 'token', 'secret')
+    monkeypatch.setattr(profiling, 'worker_description', None)
+    monkeypatch.setattr(profiling, 'concurrent_worker', False)
+    monkeypatch.setattr(profiling, 'MAX_SECONDS', profiling.MAX_SECONDS)
+    server = flask.Flask(__name__)
+    profiling.init_app(server)
+    return server.test_client()
+
+
+def test_profilers_are_refused_until_the_worker_is_known(admin):
+    response = admin.post('/admin/profile/callback?output=page-content.children&seconds=0',
+                          headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 409
+    assert 'unknown' in response.get_json()['error']
+
+
+def test_profilers_are_refused_on_single_request_workers(admin):
+    profiling.set_worker('SyncWorker', False, 30)
+    response = admin.get('/admin/profile/sample?seconds=0', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 409
+    assert 'SyncWorker' in response.get_json()['error']
+
+
+def test_profile_duration_stays_below_the_worker_timeout(admin):
+    profiling.set_worker('ThreadWorker with 4 thread(s)', True, 11)
+    assert profiling.MAX_SECONDS == 1
+    start = time.perf_counter()
+    response = admin.get('/admin/profile/sample?seconds=600&interval_ms=100', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    assert time.perf_counter() - start < 5
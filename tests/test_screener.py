@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+import screener
+
+
+def reference_pre_screener_result(switches_value):
+    # The original app.py implementation, verbatim, kept as the oracle for screener's bitmask table
+    screening_result = ""
+    color = "warning"
+    symptoms_score_mapping = {
+        "Fever": 89,
+        "Cough": 68,
+        "Fatigue": 30,
+        "Sputum": 18,
+        "Muscle": 14,
+        "Headache": 16,
+        "Sore": 16,
+        "Nausea": 5,
+        "Diarrhea": 5,
+        "Breathing": 209,
+        "Chest": 209,
+        "Confusion": 209,
+        "Bluish": 209,
+        "Age": 52,
+        "Chronic": 52
+    }
+    emergency_symptom_list = ["Breathing", "Chest", "Confusion", "Bluish"]
+    major_symptom_list = ["Fever", "Cough"]
+    check_any_emergency_symptoms = any(item in switches_value for item in emergency_symptom_list)
+    check_all_major_symptoms = all(item in switches_value for item in major_symptom_list)
+    final_score = 0
+    for symptom in switches_value:
+        final_score += symptoms_score_mapping[symptom]
+    if final_score >= 209:
+        if check_any_emergency_symptoms:
+            color = "danger"
+            if check_all_major_symptoms:
+                screening_result = "Your symptoms indicate that you should consult a doctor immediately for COVID-19 " \
+                                   "testing. "
+            else:
+                screening_result = "Your symptoms indicate that you should consult a doctor immediately."
+        else:
+            screening_result = "Your symptoms indicate that you should consult a doctor immediately for COVID-19 " \
+                               "testing. "
+    else:
+        screening_result = "Your symptoms indicate that currently you do not need COVID-19 testing. Please continue " \
+                           "to monitor your " \
+                           "health and practice social distancing. Avoid leaving the house unnecessarily. If you must " \
+                           "leave the " \
+                           "house, wear a mask or other face covering and stay at least 6 feet away from others."
+        color = "success"
+    return screening_result, color
+
+
+def selection(mask):
+    return [symptom for bit, symptom in enumerate(screener.symptoms) if mask >> bit & 1]
+
+
+ALL_MASKS = range(screener.all_symptoms_mask + 1)
+
+
+def test_covers_every_symptom_combination():
+    assert sorted(screener.symptoms) == sorted(["Fever", "Cough", "Fatigue", "Sputum", "Muscle", "Headache", "Sore",
+                                                "Nausea", "Diarrhea", "Breathing", "Chest", "Confusion", "Bluish",
+                                                "Age", "Chronic"])
+    assert len(ALL_MASKS) == 2 ** 15 == len(screener.outcome_table)
+
+
+def test_pre_screener_result_matches_reference_for_every_combination():
+    mismatches = [mask for mask in ALL_MASKS
+                  if screener.pre_screener_result(selection(mask)) != reference_pre_screener_result(selection(mask))]
+    assert mismatches == []
+
+
+def test_batched_outcomes_match_reference_for_every_combination():
+    selections = [selection(mask) for mask in ALL_MASKS]
+    masks = screener.encode_symptom_masks(selections)
+    assert np.array_equal(masks, np.arange(len(ALL_MASKS)))
+    results = screener.pre_screener_outcomes(masks)
+    mismatches = [mask for mask in ALL_MASKS
+                  if screener.outcomes[results[mask]] != reference_pre_screener_result(selections[mask])]
+    assert mismatches == []
+
+
+def test_unknown_symptom_is_rejected():
+    with pytest.raises(ValueError, match="Unknown symptom 'Sneezing' at row 1"):
+        screener.encode_symptom_masks([["Fever"], ["Cough", "Sneezing"]])
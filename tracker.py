@@ -0,0 +1,233 @@
+import collections
+import hashlib
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+import plotly.express as px
+import requests
+from plotly.graph_objs import Figure, Choropleth
+from plotly.utils import PlotlyJSONEncoder
+
+import metrics
+import persistent_cache
+import summary
+import validation
+
+logger = logging.getLogger(__name__)
+
+# Base URL of the covidtracking API; overridable so the app can run against a local stand-in (see loadtest/)
+covidtracking_api_url = os.environ.get('COVIDTRACKING_API_URL', 'https://api.covidtracking.com').rstrip('/')
+
+# One published set of tracker data and the figures built from it, kept as plain figure dicts that dcc.Graph
+# accepts and that are cheap to cache on disk. A TrackerData is never mutated once published: a refresh
+# builds a complete new one and swaps the module-level reference, so a request that grabbed current() keeps
+# a consistent view even while a refresh runs concurrently.
+TrackerData = collections.namedtuple('TrackerData', [
+    'version', 'digest', 'fetched_at', 'us_historical_df', 'states_history_df', 'df_overall_states',
+    'last_updated_date', 'summary', 'validation', 'fig1', 'fig2', 'fig3', 'fig4',
+])
+
+_versions = itertools.count(1)
+_current = None
+_refresh_lock = threading.Lock()
+_refresh_thread = None
+# (time, message) of the last failed refresh, None once a refresh succeeds again
+last_refresh_error = None
+
+
+def fetch(path):
+    response = requests.get(covidtracking_api_url + path, timeout=30)
+    response.raise_for_status()
+    return response.content
+
+
+def build_tracker_data(raw_us_df_data, raw_state_df_data, digest=None, timings=None):
+    # Each stage is timed as tracker.<stage> (see metrics.py)
+    laps = metrics.Laps('tracker', timings)
+    us_historical_df = pd.DataFrame(raw_us_df_data)
+    us_historical_df['date'] = pd.to_datetime(us_historical_df['date'], format='%Y%m%d')
+    states_history_df = pd.DataFrame(raw_state_df_data)
+    states_history_df['date'] = pd.to_datetime(states_history_df['date'], format='%Y%m%d')
+    laps.lap('parse')
+
+    us_historical_df, us_report = validation.validate(us_historical_df, 'tracker_us_daily',
+                                                      validation.us_daily_columns)
+    states_history_df, states_report = validation.validate(states_history_df, 'tracker_states_daily',
+                                                           validation.states_daily_columns, group='state')
+    laps.lap('validate')
+
+    states_daily_df = states_history_df.sort_values('date').groupby('state', as_index=False).last()
+    laps.lap('state_last')
+
+    df_overall_states = states_daily_df[['state', 'date', 'positive', 'death', 'recovered']].copy()
+    df_overall_states.loc[:, 'positive'] = df_overall_states['positive'].astype('Int32')
+    df_overall_states.loc[:, 'death'] = df_overall_states['death'].astype('Int32')
+    df_overall_states.loc[:, 'recovered'] = df_overall_states['recovered'].fillna(value=0).astype('Int32')
+    laps.lap('cast')
+
+    last_updated_date = df_overall_states.date.max().date()
+
+    df_overall_states['text'] = df_overall_states['state'] + '<br>' + \
+                                'Deaths: ' + df_overall_states['death'].astype(str) + '<br>' + \
+                                'Recovered: ' + df_overall_states['recovered'].astype(str) + '<br>'
+
+    summary_aggregates = summary.build_summary(us_historical_df, states_history_df)
+    laps.lap('summary')
+
+    fig1 = Figure(data=Choropleth(
+        locations=df_overall_states['state'],
+        z=df_overall_states['positive'],
+        locationmode='USA-states',
+        colorscale='Reds',
+        autocolorscale=False,
+        text=df_overall_states['text'],  # hover text
+        colorbar={'title': 'Positive Cases'},
+    ))
+
+    fig1.update_layout(
+        title_text='USA COVID Tracking Map (Hover for breakdown)<br>Last Updated: ' + str(last_updated_date),
+        # Create a Title
+        font=dict(size=10),
+        geo_scope='usa',
+        template="plotly_dark",
+        margin=dict(l=5, r=5, t=30, b=10),
+        dragmode=False
+    )
+
+    fig2 = px.bar(us_historical_df, y='positiveIncrease', x='date', text='positiveIncrease',
+                  labels={'positiveIncrease': 'New Positive Cases', 'date': 'Date'})
+    fig2.update_traces(hovertemplate='%{x}<br>New Positive Cases: %{y}<br>')
+    fig2.update_layout(
+        title_text='Daily Trends in Number of COVID-19 Positive Cases in the United States (Hover for each day)',
+        # Create a Title
+        font=dict(size=14),
+        template="plotly_dark",
+        margin=dict(l=5, r=5, t=30, b=10),
+        dragmode=False,
+        uniformtext_minsize=12,
+        uniformtext_mode='hide'
+    )
+
+    fig3 = px.bar(us_historical_df, y='deathIncrease', x='date', text='deathIncrease',
+                  labels={'deathIncrease': 'New Death Cases', 'date': 'Date'})
+    fig3.update_traces(hovertemplate='%{x}<br>New Death Cases: %{y}<br>', marker_color='brown')
+    fig3.update_layout(
+        title_text='Daily Trends in Number of COVID-19 Deaths in the United States (Hover for each day)',
+        # Create a Title
+        font=dict(size=14),
+        template="plotly_dark",
+        margin=dict(l=5, r=5, t=30, b=10),
+        dragmode=False,
+        uniformtext_minsize=12,
+        uniformtext_mode='hide'
+    )
+
+    fig4 = px.bar(us_historical_df, y='hospitalizedIncrease', x='date', text='hospitalizedIncrease',
+                  labels={'hospitalizedIncrease': 'New Total Hospitalizations', 'date': 'Date'})
+    fig4.update_traces(hovertemplate='%{x}<br>New Total Hospitalizations: %{y}<br>', marker_color='green')
+    fig4.update_layout(
+        title_text='Daily Increase in Number of Total Hospitalizations in the United States (Hover for each day)',
+        # Create a Title
+        font=dict(size=14),
+        template="plotly_dark",
+        margin=dict(l=5, r=5, t=30, b=10),
+        dragmode=False,
+        uniformtext_minsize=12,
+        uniformtext_mode='hide'
+    )
+
+    laps.lap('figures')
+
+    figures = [fig.to_plotly_json() for fig in (fig1, fig2, fig3, fig4)]
+    laps.lap('to_dict')
+
+    return TrackerData(
+        version=next(_versions), digest=digest, fetched_at=time.time(), us_historical_df=us_historical_df,
+        states_history_df=states_history_df, df_overall_states=df_overall_states,
+        last_updated_date=last_updated_date, summary=summary_aggregates, validation=(us_report, states_report),
+        fig1=figures[0], fig2=figures[1], fig3=figures[2], fig4=figures[3],
+    )
+
+
+def refresh():
+    global _current, last_refresh_error
+    # Serialize refreshes within a process; readers never take this lock
+    with _refresh_lock:
+        timings = {}
+        built = []
+        try:
+            with metrics.span('tracker.refresh', timings):
+                with metrics.span('tracker.fetch', timings):
+                    raw_us = fetch("/v1/us/daily.json")
+                    raw_states = fetch("/v1/states/daily.json")
+                digest = hashlib.sha1(raw_us + b'\0' + raw_states).hexdigest()
+
+                def build():
+                    built.append(True)
+                    with metrics.span('tracker.decode', timings):
+                        raw_us_df_data, raw_state_df_data = json.loads(raw_us), json.loads(raw_states)
+                    return build_tracker_data(raw_us_df_data, raw_state_df_data, digest, timings)
+
+                # Unchanged payloads (e.g. after a restart) reuse the snapshot built by any earlier process
+                data = persistent_cache.get_or_build('tracker', digest + '-' + validation.default_mode, build)
+                # The JSON the tracker page sends for each figure, encoded as Dash does; timed on every refresh,
+                # as the figure dicts may come from the cache
+                with metrics.span('tracker.serialize', timings):
+                    figure_bytes = {name: len(json.dumps(getattr(data, name), cls=PlotlyJSONEncoder))
+                                    for name in ('fig1', 'fig2', 'fig3', 'fig4')}
+        except Exception as error:
+            last_refresh_error = (time.time(), f"{type(error).__name__}: {error}")
+            metrics.count('tracker_refresh_failures_total')
+            raise
+        for report in data.validation:
+            validation.last_reports[report.dataset] = report
+        data = data._replace(version=next(_versions), fetched_at=time.time())
+        _current = data
+        last_refresh_error = None
+        metrics.set_gauge('tracker_payload_bytes', len(raw_us), path='/v1/us/daily.json')
+        metrics.set_gauge('tracker_payload_bytes', len(raw_states), path='/v1/states/daily.json')
+        for name, size in figure_bytes.items():
+            metrics.set_gauge('tracker_figure_json_bytes', size, figure=name)
+        metrics.set_gauge('tracker_last_refresh_success_timestamp_seconds', data.fetched_at)
+        logger.info("%s", json.dumps({
+            'event': 'tracker_refresh', 'digest': digest[:12], 'last_updated_date': str(data.last_updated_date),
+            'payload_bytes': len(raw_us) + len(raw_states), 'figure_json_bytes': sum(figure_bytes.values()),
+            'cached': not built, 'stages_ms': timings,
+        }))
+    return data
+
+
+def current():
+    data = _current
+    if data is None:
+        data = refresh()
+    return data
+
+
+def loaded():
+    # The published data without triggering a fetch; None until the first refresh has finished
+    return _current
+
+
+def _refresh_forever(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            refresh()
+        except Exception:
+            # Keep serving the last good data; the next tick retries
+            logger.exception("Refreshing covidtracking data failed")
+
+
+def start_background_refresh(interval):
+    global _refresh_thread
+    if interval <= 0 or _refresh_thread is not None:
+        return
+    _refresh_thread = threading.Thread(target=_refresh_forever, args=(interval,), name='tracker-refresh',
+                                       daemon=True)
+    _refresh_thread.start()
@@ -0,0 +1,183 @@
+import collections
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# What to do with bad rows: 'report' only logs them, 'clamp' also clamps negative daily increases to 0, and
+# 'quarantine' drops rows that fail a row-level check (missing keys/dates, unparseable or negative counts,
+# duplicate dates). Decreasing cumulative series are always only reported; they are usually corrections.
+MODES = ('report', 'clamp', 'quarantine')
+default_mode = os.environ.get('DATA_VALIDATION_MODE', 'report')
+
+# kind is one of 'key', 'date', 'cumulative', 'increase' or 'count'; ``flag`` names the column holding the
+# CDC suppression footnote for a count, whose empty cells are then suppressed rather than missing
+Column = collections.namedtuple('Column', ['name', 'kind', 'required', 'flag'])
+Column.__new__.__defaults__ = (True, None)
+
+Issue = collections.namedtuple('Issue', ['check', 'column', 'count', 'rows'])
+ValidationReport = collections.namedtuple('ValidationReport', [
+    'dataset', 'mode', 'rows', 'issues', 'suppressed', 'clamped', 'quarantined', 'duration_ms',
+])
+
+TRACKER_INCREASES = ['positiveIncrease', 'deathIncrease', 'hospitalizedIncrease']
+
+us_daily_columns = [
+    Column('date', 'date'),
+    Column('positive', 'cumulative'),
+    Column('death', 'cumulative'),
+    Column('recovered', 'cumulative', required=False),
+    Column('hospitalized', 'cumulative', required=False),
+] + [Column(name, 'increase') for name in TRACKER_INCREASES]
+
+states_daily_columns = [
+    Column('state', 'key'),
+    Column('date', 'date'),
+    Column('positive', 'cumulative'),
+    Column('death', 'cumulative'),
+    Column('recovered', 'cumulative'),
+    Column('hospitalized', 'cumulative', required=False),
+] + [Column(name, 'increase', required=False) for name in TRACKER_INCREASES]
+
+age_sex_state_columns = [
+    Column('State', 'key'),
+    Column('Sex', 'key'),
+    Column('Age group', 'key'),
+    Column('COVID-19 Deaths', 'count', flag='Footnote'),
+    Column('Footnote', 'flag', required=False),
+]
+
+underlying_conditions_columns = [
+    Column('State', 'key'),
+    Column('Condition Group', 'key'),
+    Column('Condition', 'key'),
+    Column('ICD10_codes', 'key'),
+    Column('Age Group', 'key'),
+    Column('Number of COVID-19 Deaths', 'count', flag='Flag'),
+    Column('Flag', 'flag', required=False),
+]
+
+# Most recent report per dataset
+last_reports = {}
+
+_SAMPLE_ROWS = 10
+
+
+def _issue(issues, check, column, mask):
+    count = int(mask.sum())
+    if count:
+        issues.append(Issue(check, column, count, np.flatnonzero(mask)[:_SAMPLE_ROWS].tolist()))
+
+
+def _decreasing(values, groups, order):
+    # Rows whose cumulative value is lower than the previous reported value of the same group; ``order``
+    # sorts the rows by group, then date
+    ordered = values[order]
+    reported = ~np.isnan(ordered)
+    positions = order[reported]
+    ordered = ordered[reported]
+    drops = ordered[1:] < ordered[:-1]
+    if groups is not None:
+        drops &= groups[positions[1:]] == groups[positions[:-1]]
+    mask = np.zeros(len(values), dtype=bool)
+    mask[positions[1:][drops]] = True
+    return mask
+
+
+def validate(df, dataset, columns, group=None, mode=None):
+    mode = mode or default_mode
+    if mode not in MODES:
+        raise ValueError(f"Unknown validation mode {mode!r}, expected one of {MODES}")
+    start = time.perf_counter()
+
+    missing_columns = [c.name for c in columns if c.required and c.name not in df.columns]
+    if missing_columns:
+        raise ValueError(f"{dataset}: missing expected columns {missing_columns} (got {list(df.columns)})")
+
+    if mode != 'report':
+        df = df.copy()
+    issues = []
+    bad = np.zeros(len(df), dtype=bool)
+    suppressed = clamped = 0
+    groups = pd.factorize(df[group])[0] if group else None
+    order = None
+    date_column = next((c.name for c in columns if c.kind == 'date'), None)
+    if date_column is not None:
+        dates = df[date_column].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        order = np.lexsort((dates, groups)) if groups is not None else np.argsort(dates, kind='stable')
+
+    for column in columns:
+        if column.name not in df.columns or column.kind == 'flag':
+            continue
+        series = df[column.name]
+        if column.kind in ('key', 'date'):
+            null = series.isna().to_numpy()
+            _issue(issues, 'missing', column.name, null)
+            bad |= null
+            continue
+
+        if not pd.api.types.is_numeric_dtype(series):
+            numeric = pd.to_numeric(series, errors='coerce')
+            unparseable = (numeric.isna() & series.notna()).to_numpy()
+            _issue(issues, 'dtype', column.name, unparseable)
+            bad |= unparseable
+            series = numeric
+            if mode != 'report':
+                df[column.name] = numeric
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+
+        negative = values < 0
+        if column.kind == 'increase' and mode == 'clamp':
+            clamped += int(negative.sum())
+            df.loc[negative, column.name] = 0
+        else:
+            bad |= negative
+        _issue(issues, 'negative', column.name, negative)
+
+        if column.flag is not None and column.flag in df.columns:
+            empty = np.isnan(values)
+            flagged = df[column.flag].notna().to_numpy()
+            suppressed += int((empty & flagged).sum())
+            _issue(issues, 'missing', column.name, empty & ~flagged)
+
+        if column.kind == 'cumulative' and order is not None:
+            _issue(issues, 'decreasing', column.name, _decreasing(values, groups, order))
+
+    keys = [c.name for c in columns if c.kind in ('key', 'date') and c.name in df.columns]
+    if keys:
+        duplicated = df.duplicated(keys, keep='first').to_numpy()
+        _issue(issues, 'duplicate', '/'.join(keys), duplicated)
+        bad |= duplicated
+
+    quarantined = 0
+    if mode == 'quarantine' and bad.any():
+        quarantined = int(bad.sum())
+        df = df[~bad]
+
+    report = ValidationReport(
+        dataset=dataset, mode=mode, rows=len(bad), issues=issues, suppressed=suppressed, clamped=clamped,
+        quarantined=quarantined, duration_ms=(time.perf_counter() - start) * 1000,
+    )
+    last_reports[dataset] = report
+    if issues:
+        logger.warning("%s: %s", dataset, format_issues(report))
+    return df, report
+
+
+def format_issues(report):
+    parts = [f"{issue.count} {issue.check} {issue.column}" for issue in report.issues]
+    if report.clamped:
+        parts.append(f"{report.clamped} clamped")
+    if report.quarantined:
+        parts.append(f"{report.quarantined} quarantined")
+    return ', '.join(parts) or 'ok'
+
+
+def report_as_dict(report):
+    result = report._asdict()
+    result['issues'] = [issue._asdict() for issue in report.issues]
+    return result